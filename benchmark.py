@@ -0,0 +1,290 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tracemalloc
+import contextlib
+import numpy as np
+
+from multiplealign.substmatrix import SubstMatrix
+from multiplealign.pairwisealignment import PairwiseAlignment
+from multiplealign.myseq import MySeq
+import multiplealign.pairwisealignment
+import multiplealign.substmatrix
+import multiplealign.myalign
+#* multiplealign.py corre testMSA() ao ser importado: nao deixar esse output no relatorio
+with contextlib.redirect_stdout(open(os.devnull, 'w')):
+    import multiplealign.multiplealign
+import project1 as ga
+import crossover as cross
+import crossover_lab as cross_l
+import encoded_msa as enc
+
+#* O pacote upgma usa imports "flat" (from pairwisealignment import ...): pomos a pasta no path e
+#* apontamos esses nomes para os modulos do pacote multiplealign so durante o import
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, 'upgma'))
+_aliases = {'pairwisealignment': multiplealign.pairwisealignment, 'substmatrix': multiplealign.substmatrix,
+            'myalign': multiplealign.myalign, 'multiplealign': multiplealign.multiplealign}
+_saved = {name: sys.modules.get(name) for name in _aliases}
+sys.modules.update(_aliases)
+try:
+    from upgma import UPGMA
+    from hierarchicalclustering import HierarchicalClustering
+finally:
+    for name, module in _saved.items():
+        if module is None:
+            del sys.modules[name]
+        else:
+            sys.modules[name] = module
+
+AMINO_ACIDS = "ARNDCQEGHILKMFPSTWYV"
+GAP_PENALTY = -8
+
+
+#* ---------------- Dados gerados (familias de sequencias homologas, com seed) ----------------
+
+def generate_family(num_seqs, length, seed=0, mutation_rate=0.15, indel_rate=0.03):
+    rng = random.Random(seed)
+    root = [rng.choice(AMINO_ACIDS) for _ in range(length)]
+    family = []
+    for _ in range(num_seqs):
+        seq = []
+        for c in root:
+            r = rng.random()
+            if r < indel_rate / 2:
+                continue
+            seq.append(rng.choice(AMINO_ACIDS) if r < mutation_rate else c)
+            if rng.random() < indel_rate / 2:
+                seq.append(rng.choice(AMINO_ACIDS))
+        family.append(''.join(seq))
+    return family
+
+
+def random_alignment(num_seqs, length, representation=ga.REPR_STRING, seed=0, family_seed=0):
+    #* family_seed fixa os residuos, seed so os offsets: os pais de um crossover usam a mesma familia
+    random.seed(seed)
+    np.random.seed(seed)
+    sequences = generate_family(num_seqs, length, family_seed)
+    if representation == ga.REPR_ARRAY:
+        sequences = enc.encode_sequences(sequences)
+    return ga.create_random_alignment(sequences, max_offset=length // 10)
+
+
+def load_submat():
+    sm = SubstMatrix()
+    sm.read_submat_file(os.path.join(ROOT, "blosum62.mat"))
+    return sm
+
+
+#* ---------------- Casos: cada um recebe os parametros e devolve a funcao a medir ----------------
+
+def case_needleman_wunsch(sm, length):
+    pa = PairwiseAlignment(sm, GAP_PENALTY)
+    s1, s2 = [MySeq(s, "PROTEIN") for s in generate_family(2, length)]
+
+    def run():
+        pa.needleman_Wunsch(s1, s2)
+        pa.recover_align()
+    return run
+
+
+def case_smith_waterman(sm, length):
+    pa = PairwiseAlignment(sm, GAP_PENALTY)
+    s1, s2 = [MySeq(s, "PROTEIN") for s in generate_family(2, length)]
+
+    def run():
+        i, j = pa.smith_Waterman(s1, s2)
+        pa.recover_align_local(i, j)
+    return run
+
+
+def case_score_msa(sm, num_seqs, length, representation):
+    ga.pa = PairwiseAlignment(sm, GAP_PENALTY)
+    ga.scorer = None
+    ga.fitness_cache = None
+    msa = random_alignment(num_seqs, length, representation)
+    return lambda: ga.score_MSA(msa)
+
+
+def case_mutate_split_gap_block(sm, num_seqs, length, representation):
+    msa = random_alignment(num_seqs, length, representation)
+    return lambda: ga.mutate_split_gap_block(msa)
+
+
+def case_crossover(module, num_seqs, length, representation):
+    father = random_alignment(num_seqs, length, representation, seed=1)
+    mother = random_alignment(num_seqs, length, representation, seed=2)
+    residues = ga.count_residues(father[0])
+
+    def run():
+        #* Ponto de corte escolhido como em make_crossover_offspring
+        num_residues = random.randint(1, residues - 1)
+        if module is cross_l:
+            module.generate_offspring(father, mother, cross_l.index_at_residue(father[0], num_residues))
+        else:
+            module.generate_offspring(father, mother, num_residues)
+    return run
+
+
+def case_crossover_cross(sm, num_seqs, length, representation):
+    return case_crossover(cross, num_seqs, length, representation)
+
+
+def case_crossover_lab(sm, num_seqs, length, representation):
+    return case_crossover(cross_l, num_seqs, length, representation)
+
+
+def case_upgma_mat_dist(sm, num_seqs, length):
+    pa = PairwiseAlignment(sm, GAP_PENALTY)
+    seqs = [MySeq(s, "PROTEIN") for s in generate_family(num_seqs, length)]
+    return lambda: UPGMA(seqs, pa)
+
+
+def case_hierarchical_clustering(sm, num_seqs):
+    rng = np.random.default_rng(0)
+    points = rng.random((num_seqs, 8))
+    dist = np.sqrt(((points[:, None] - points[None]) ** 2).sum(axis=-1))
+    condensed = dist[np.triu_indices(num_seqs, 1)]
+    return lambda: HierarchicalClustering(condensed).execute_clustering()
+
+
+REPRS = [ga.REPR_STRING, ga.REPR_ARRAY]
+
+#* nome -> (caso, grelha completa, grelha --quick)
+CASES = {
+    'needleman_Wunsch': (case_needleman_wunsch,
+                         [dict(length=n) for n in (50, 100, 200, 400, 800)],
+                         [dict(length=n) for n in (50, 100)]),
+    'smith_Waterman': (case_smith_waterman,
+                       [dict(length=n) for n in (50, 100, 200, 400, 800)],
+                       [dict(length=n) for n in (50, 100)]),
+    'score_MSA': (case_score_msa,
+                  [dict(num_seqs=k, length=n, representation=r) for r in REPRS for k in (5, 20, 50) for n in (100, 400)],
+                  [dict(num_seqs=k, length=100, representation=r) for r in REPRS for k in (5, 10)]),
+    'mutate_split_gap_block': (case_mutate_split_gap_block,
+                               [dict(num_seqs=k, length=n, representation=r) for r in REPRS for k in (5, 20, 50) for n in (100, 400)],
+                               [dict(num_seqs=k, length=100, representation=r) for r in REPRS for k in (5, 10)]),
+    'crossover.generate_offspring': (case_crossover_cross,
+                                     [dict(num_seqs=k, length=n, representation=r) for r in REPRS for k in (5, 20, 50) for n in (100, 400)],
+                                     [dict(num_seqs=k, length=100, representation=r) for r in REPRS for k in (5, 10)]),
+    'crossover_lab.generate_offspring': (case_crossover_lab,
+                                         [dict(num_seqs=k, length=n, representation=r) for r in REPRS for k in (5, 20, 50) for n in (100, 400)],
+                                         [dict(num_seqs=k, length=100, representation=r) for r in REPRS for k in (5, 10)]),
+    'UPGMA.create_mat_dist': (case_upgma_mat_dist,
+                              [dict(num_seqs=k, length=100) for k in (5, 10, 20, 40)],
+                              [dict(num_seqs=k, length=100) for k in (5, 10)]),
+    'HierarchicalClustering.execute_clustering': (case_hierarchical_clustering,
+                                                  [dict(num_seqs=k) for k in (50, 200, 800, 2000)],
+                                                  [dict(num_seqs=k) for k in (50, 200)]),
+}
+
+
+#* ---------------- Medição ----------------
+
+def measure(fn, min_time=0.2, max_calls=1000):
+    #* Aquecimento, depois chamadas repetidas até min_time; memoria de pico numa chamada à parte
+    random.seed(0)
+    np.random.seed(0)
+    fn()
+    times = []
+    start = time.perf_counter()
+    while len(times) < max_calls and (time.perf_counter() - start < min_time or len(times) < 3):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    total = sum(times)
+
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'calls': len(times),
+        'wall_median_s': float(np.median(times)),
+        'wall_min_s': min(times),
+        'calls_per_s': len(times) / total if total > 0 else float('inf'),
+        'peak_memory_kib': peak / 1024,
+    }
+
+
+def run_benchmarks(names=None, quick=False, min_time=0.2):
+    sm = load_submat()
+    results = []
+    for name, (case, grid, quick_grid) in CASES.items():
+        if names and name not in names:
+            continue
+        for params in (quick_grid if quick else grid):
+            fn = case(sm, **params)
+            stats = measure(fn, min_time)
+            results.append(dict(name=name, params=params, **stats))
+            print(f"{name:45s} {json.dumps(params):55s} {stats['wall_median_s']*1e3:10.3f} ms "
+                  f"{stats['calls_per_s']:10.1f} calls/s {stats['peak_memory_kib']:10.1f} KiB")
+    return results
+
+
+def key_of(result):
+    return result['name'] + ' ' + json.dumps(result['params'], sort_keys=True)
+
+
+def compare(results, baseline, threshold=0.2):
+    #* Regressao: tempo mediano acima de (1 + threshold) vezes o da baseline
+    base = {key_of(r): r for r in baseline['results']}
+    regressions = []
+    for r in results:
+        b = base.get(key_of(r))
+        if b is None:
+            continue
+        ratio = r['wall_median_s'] / b['wall_median_s'] if b['wall_median_s'] > 0 else float('inf')
+        flag = 'REGRESSION' if ratio > 1 + threshold else ('faster' if ratio < 1 - threshold else '')
+        print(f"{key_of(r):100s} x{ratio:6.2f} {flag}")
+        if flag == 'REGRESSION':
+            regressions.append((key_of(r), ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks of the alignment / GA / clustering hot paths")
+    parser.add_argument('-o', '--output', default='benchmark_results.json')
+    parser.add_argument('-b', '--baseline', help="previous results JSON to compare against")
+    parser.add_argument('-t', '--threshold', type=float, default=0.2, help="allowed slowdown (0.2 = 20%%)")
+    parser.add_argument('-q', '--quick', action='store_true', help="small inputs only")
+    parser.add_argument('--min-time', type=float, default=0.2, help="seconds of timed calls per case")
+    parser.add_argument('names', nargs='*', help=f"cases to run (default: all): {', '.join(CASES)}")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.names if name not in CASES]
+    if unknown:
+        parser.error(f"unknown case(s): {', '.join(unknown)}")
+
+    results = run_benchmarks(args.names, args.quick, args.min_time)
+    report = {
+        'meta': {
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'quick': args.quick,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=1)
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print()
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
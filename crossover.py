@@ -1,8 +1,14 @@
+import numpy as np
+import encoded_msa as enc
+
+
 def get_residues_only(seq):
     return seq.replace('-', '')
 
 
 def extract_offsets_and_residues(align):
+    if isinstance(align, np.ndarray):
+        return [int(o) for o in enc.leading_gaps(align)], [enc.residues_of(row) for row in align]
 
     offsets = []
     residues_list = []
@@ -23,6 +29,8 @@ def extract_offsets_and_residues(align):
 
 
 def reconstruct_from_offsets(offsets, residues_list):
+    if isinstance(residues_list[0], np.ndarray):
+        return enc.remove_gap_only_columns(enc.build_alignment(offsets, residues_list))
 
     #* Criar sequências com offsets
     seqs = []
@@ -38,6 +46,9 @@ def reconstruct_from_offsets(offsets, residues_list):
 
 
 def remove_gap_only_columns(align):
+    if isinstance(align, np.ndarray):
+        return enc.remove_gap_only_columns(align)
+
     if not align or len(align[0]) == 0:
         return align
     
@@ -56,6 +67,14 @@ def remove_gap_only_columns(align):
     return result
 
 
+def same_residues(residues1, residues2):
+    if len(residues1) != len(residues2):
+        return False
+    if residues1 and isinstance(residues1[0], np.ndarray):
+        return all(np.array_equal(r1, r2) for r1, r2 in zip(residues1, residues2))
+    return residues1 == residues2
+
+
 def generate_offspring(align1, align2, crossover_point=None):
 
     import random
@@ -64,7 +83,7 @@ def generate_offspring(align1, align2, crossover_point=None):
     offsets2, residues2 = extract_offsets_and_residues(align2)
     
     # Verificar se resíduos são iguais
-    if residues1 != residues2:
+    if not same_residues(residues1, residues2):
         # Se não são, não podemos fazer crossover
         return align1, align2
     
@@ -1,11 +1,18 @@
 ###cross2
+import numpy as np
+import encoded_msa as enc
 from multiplealign.myalign import MyAlign
 
 def count_residues(seq):
+    if isinstance(seq, np.ndarray):
+        return enc.count_residues(seq)
     return sum(1 for char in seq if char != '-')
 
 
 def index_at_residue(seq, num_residues):
+    if isinstance(seq, np.ndarray):
+        return enc.index_at_residue(seq, num_residues)
+
     count = 0
     for i, char in enumerate(seq):
         if char != '-':
@@ -84,6 +91,9 @@ def is_all_gaps(align, col):
 
 
 def clean_alignment(align):
+    if isinstance(align, np.ndarray):
+        return enc.remove_gap_only_columns(align)
+
     if not align or len(align[0]) == 0:
         return align
     
@@ -100,8 +110,43 @@ def clean_alignment(align):
     return cleaned
 
 
+def generate_offspring_array(align1, align2, crossover_point):
+    import random
+
+    if align1.shape[0] != align2.shape[0] or align1.shape[0] == 0:
+        return align1, align2
+
+    if crossover_point is None:
+        max_len = align1.shape[1]
+        if max_len <= 1:
+            return align1, align2
+        crossover_point = random.randint(1, max_len - 1)
+
+    #* Corte vertical no align1, o align2 é cortado residuo a residuo (cada linha num indice)
+    l1, r1 = align1[:, :crossover_point], align1[:, crossover_point:]
+    residues = (l1 != enc.GAP).sum(axis=1)
+    indexes2 = np.array([enc.index_at_residue(row, r) for row, r in zip(align2, residues)])
+
+    #* l2 preenchido com gaps à direita e r2 preenchido com gaps à esquerda
+    width2 = align2.shape[1]
+    left_width = int(indexes2.max())
+    right_width = width2 - int(indexes2.min())
+    cols = np.arange(left_width)
+    l2_padded = np.where(cols < indexes2[:, None], align2[:, :left_width], enc.GAP).astype(np.uint8)
+    src_cols = np.arange(width2 - right_width, width2)
+    r2_padded = np.where(src_cols >= indexes2[:, None], align2[:, width2 - right_width:], enc.GAP).astype(np.uint8)
+
+    offspring1 = enc.remove_gap_only_columns(np.hstack((l1, r2_padded)))
+    offspring2 = enc.remove_gap_only_columns(np.hstack((l2_padded, r1)))
+
+    return offspring1, offspring2
+
+
 def generate_offspring(align1, align2, crossover_point):
     import random
+
+    if isinstance(align1, np.ndarray):
+        return generate_offspring_array(align1, align2, crossover_point)
     
     if len(align1) != len(align2):
         return align1, align2
@@ -0,0 +1,108 @@
+import numpy as np
+
+#* Cada residuo fica com o seu codigo ASCII, o gap é o código reservado ord('-')
+GAP = ord('-')
+
+
+def encode_seq(seq):
+    #* Arrays uint8 (ex: views de um SeqStore) ja estao codificados, nao sao copiados
+    if isinstance(seq, np.ndarray):
+        return seq
+    return np.frombuffer(seq.encode('ascii'), dtype=np.uint8)
+
+
+def encode_sequences(sequences, alphabet=None):
+    encoded = [encode_seq(seq) for seq in sequences]
+
+    #* Validar logo aqui os residuos (na versao string o erro só aparecia ao fazer score)
+    if alphabet is not None:
+        valid = np.zeros(256, dtype=bool)
+        valid[encode_seq(''.join(alphabet))] = True
+        for seq, enc in zip(sequences, encoded):
+            if not valid[enc].all():
+                bad = sorted(set(chr(c) for c in enc[~valid[enc]]))
+                raise KeyError(f"Residues not in substitution matrix: {bad}")
+
+    return encoded
+
+
+def decode_row(row):
+    return row.tobytes().decode('ascii')
+
+
+def decode_alignment(msa):
+    return [decode_row(row) for row in msa]
+
+
+def remove_gap_only_columns(msa):
+    keep = (msa != GAP).any(axis=0)
+    if keep.all():
+        return msa
+    return msa[:, keep]
+
+
+def remove_gap_only_columns_window(msa, start, end):
+    keep = (msa[:, start:end] != GAP).any(axis=0)
+    if keep.all():
+        return msa, end
+    cols = np.concatenate((np.arange(start), start + np.flatnonzero(keep), np.arange(end, msa.shape[1])))
+    return msa[:, cols], start + int(keep.sum())
+
+
+def count_residues(row):
+    return int(np.count_nonzero(row != GAP))
+
+
+def residues_of(row):
+    return row[row != GAP]
+
+
+def leading_gaps(msa):
+    #* argmax devolve a primeira coluna que nao é gap em cada linha
+    return (msa != GAP).argmax(axis=1)
+
+
+def index_at_residue(row, num_residues):
+    #* Igual a crossover_lab.index_at_residue: coluna logo a seguir ao num_residues-esimo residuo
+    if num_residues <= 0:
+        return len(row)
+    cum = np.cumsum(row != GAP)
+    idx = int(np.searchsorted(cum, num_residues))
+    if idx >= len(row):
+        return len(row)
+    return idx + 1
+
+
+def gap_blocks(row, min_length=2):
+    is_gap = np.concatenate(([False], row == GAP, [False]))
+    changes = np.flatnonzero(is_gap[1:] != is_gap[:-1])
+    starts, ends = changes[::2], changes[1::2]
+    keep = (ends - starts) >= min_length
+    return [(int(s), int(e)) for s, e in zip(starts[keep], ends[keep])]
+
+
+def build_alignment(offsets, residues_list):
+    #* Matriz toda a gaps e depois colocamos os residuos a seguir ao offset de cada linha
+    width = max(off + len(res) for off, res in zip(offsets, residues_list))
+    msa = np.full((len(residues_list), width), GAP, dtype=np.uint8)
+    for i, (off, res) in enumerate(zip(offsets, residues_list)):
+        msa[i, off:off + len(res)] = res
+    return msa
+
+
+def pair_score_table(sm, g):
+    #* Tabela 256x256 indexada pelos codigos, com a penalidade de gap ja incluida
+    if sm.matrix is None:
+        sm.build_dense()
+    codes = np.flatnonzero(sm.index >= 0)
+    table = np.zeros((256, 256), dtype=np.int64)
+    table[np.ix_(codes, codes)] = sm.with_gap(g)[np.ix_(sm.index[codes], sm.index[codes])]
+    return table
+
+
+def score_pairs(msa, table):
+    score = 0
+    n = msa.shape[0]
+    for i in range(n):
+        score += int(table[msa[i], msa[i + 1:]].sum())
+    return score
@@ -0,0 +1,153 @@
+import os
+import re
+import mmap
+from collections import namedtuple
+
+#* Uma linha por registo, como o .fai do samtools: nome, comprimento, offset do primeiro
+#* residuo, residuos por linha e bytes por linha (com o fim de linha)
+FaiEntry = namedtuple('FaiEntry', ['name', 'length', 'offset', 'linebases', 'linewidth'])
+
+HTML_TAG = re.compile(rb'<[^>]*>')
+
+
+def record_name(header):
+    #* O nome de um registo é a primeira palavra do cabeçalho (sem o '>'), como no samtools
+    words = header.split()
+    return words[0] if words else ''
+
+
+def header_name(line):
+    #* Cabeçalho '>' ou '&gt;' (depois de tirar as tags HTML); None se a linha nao for um cabeçalho
+    line = HTML_TAG.sub(b'', line).strip()
+    if line.startswith(b'>'):
+        line = line[1:]
+    elif line.startswith(b'&gt;'):
+        line = line[4:]
+    else:
+        return None
+    return record_name(line.decode('ascii'))
+
+
+def build_index(filename):
+    entries = []
+    current = None
+    ended = False
+    offset = 0
+    with open(filename, 'rb', buffering=1 << 20) as f:
+        magic = f.read(3)
+        if magic[:2] == b'\x1f\x8b' or magic == b'BZh':
+            raise ValueError(f"{filename}: compressed FASTA files cannot be indexed")
+        f.seek(0)
+        for line in f:
+            name = header_name(line)
+            if name is not None:
+                if current is not None:
+                    entries.append(FaiEntry(*current))
+                #* [nome, comprimento, offset, residuos por linha, bytes por linha]
+                current = [name, 0, offset + len(line), 0, 0]
+                ended = False
+                short = False
+            elif current is not None:
+                bases = len(line.rstrip(b'\r\n'))
+                residues = HTML_TAG.sub(b'', line).strip()
+                if not residues:
+                    #* Linha vazia ou so com tags: fim da sequencia deste registo
+                    ended = current[1] > 0 or ended
+                elif ended or short or len(residues) != bases or (current[3] and bases > current[3]):
+                    raise ValueError(f"{filename}: record {current[0]} does not have uniform lines")
+                else:
+                    if current[3] == 0:
+                        current[3] = bases
+                        current[4] = len(line)
+                    elif bases < current[3] or len(line) != current[4]:
+                        short = True
+                    current[1] += bases
+            offset += len(line)
+    if current is not None:
+        entries.append(FaiEntry(*current))
+    return entries
+
+
+def write_index(entries, fai_file):
+    tmp = fai_file + '.tmp'
+    with open(tmp, 'w') as f:
+        for e in entries:
+            f.write('\t'.join(str(x) for x in e) + '\n')
+    os.replace(tmp, fai_file)
+
+
+def read_index(fai_file):
+    entries = []
+    with open(fai_file) as f:
+        for line in f:
+            name, length, offset, linebases, linewidth = line.rstrip('\n').split('\t')[:5]
+            entries.append(FaiEntry(name, int(length), int(offset), int(linebases), int(linewidth)))
+    return entries
+
+
+class FastaIndex:
+    #* Acesso aleatorio aos registos de um FASTA atraves do indice filename + '.fai' (criado uma
+    #* vez e reutilizado enquanto for mais recente que o FASTA) e de um mmap do ficheiro
+
+    def __init__(self, filename):
+        self.filename = filename
+        fai_file = filename + '.fai'
+        if os.path.exists(fai_file) and os.path.getmtime(fai_file) >= os.path.getmtime(filename):
+            self.entries = read_index(fai_file)
+        else:
+            self.entries = build_index(filename)
+            write_index(self.entries, fai_file)
+        self.by_name = {e.name: e for e in self.entries}
+        self.file = None
+        self.data = None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, name):
+        return name in self.by_name
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def names(self):
+        return [e.name for e in self.entries]
+
+    def entry(self, key):
+        #* Por nome ou por posição no ficheiro
+        if isinstance(key, int):
+            return self.entries[key]
+        if key not in self.by_name:
+            raise KeyError(f"Sequence not in index: {key}")
+        return self.by_name[key]
+
+    def length(self, key):
+        return self.entry(key).length
+
+    def fetch(self, key, start=0, end=None):
+        #* Subsequencia [start, end) sem ler o resto do ficheiro
+        e = self.entry(key)
+        end = e.length if end is None else min(end, e.length)
+        start = max(0, start)
+        if start >= end:
+            return ''
+        if self.data is None:
+            self.file = open(self.filename, 'rb')
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        first = e.offset + (start // e.linebases) * e.linewidth + start % e.linebases
+        last = e.offset + ((end - 1) // e.linebases) * e.linewidth + (end - 1) % e.linebases + 1
+        chunk = self.data[first:last]
+        if e.linewidth != e.linebases:
+            #* Tirar os fins de linha (todos têm linewidth - linebases bytes)
+            chunk = b''.join(chunk.split())
+        return chunk.decode('ascii')
+
+    def close(self):
+        if self.data is not None:
+            self.data.close()
+            self.file.close()
+            self.data = None
+            self.file = None
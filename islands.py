@@ -0,0 +1,142 @@
+import random
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+import project1 as ga
+import encoded_msa as enc
+
+TOPOLOGY_RING = 'ring'
+TOPOLOGY_RANDOM = 'random'
+
+
+def init_island(task):
+    sequences, population_size, max_offset, seed = task
+    random.seed(seed)
+    np.random.seed(seed)
+    population = ga.initialize_population(sequences, population_size, max_offset)
+    scored_population = [(ind, ga.score_MSA(ind)) for ind in population]
+    scored_population.sort(key=lambda x: x[1], reverse=True)
+    return scored_population
+
+
+def evolve_island(task):
+    #* Corre M gerações de uma ilha com o create_next_generation normal
+    scored_population, generations, seed, crossover, delta_scoring, selection = task
+    random.seed(seed)
+    np.random.seed(seed)
+    history = []
+    for _ in range(generations):
+        scored_population = ga.create_next_generation(scored_population, len(scored_population), elite_size=0.1,
+                                                      mutation_prob=0.3, crossover=crossover,
+                                                      delta_scoring=delta_scoring, selection=selection)
+        scored_population.sort(key=lambda x: x[1], reverse=True)
+        history.append(scored_population[0][1])
+    return scored_population, history
+
+
+def migration_targets(num_islands, topology=TOPOLOGY_RING):
+    #* Para cada ilha, a ilha que recebe os seus migrantes
+    if topology == TOPOLOGY_RING:
+        return [(k + 1) % num_islands for k in range(num_islands)]
+
+    #* Topologia aleatoria: permutação sem pontos fixos (nenhuma ilha envia para si propria)
+    while True:
+        targets = list(range(num_islands))
+        random.shuffle(targets)
+        if all(k != t for k, t in enumerate(targets)):
+            return targets
+
+
+def migrate(populations, num_migrants, topology=TOPOLOGY_RING):
+    num_islands = len(populations)
+    if num_islands < 2 or num_migrants <= 0:
+        return populations
+
+    targets = migration_targets(num_islands, topology)
+    migrants = [pop[:num_migrants] for pop in populations]
+
+    #* Os melhores de cada ilha substituem os piores da ilha de destino
+    new_populations = [list(pop) for pop in populations]
+    for source, target in enumerate(targets):
+        new_populations[target][-num_migrants:] = migrants[source]
+    for pop in new_populations:
+        pop.sort(key=lambda x: x[1], reverse=True)
+    return new_populations
+
+
+def run_island_model(sequences, num_islands=4, island_size=25, max_generations=100, migration_interval=10,
+                     num_migrants=2, topology=TOPOLOGY_RING, no_improvement_limit=20, max_offset=10,
+                     crossover=ga.CROSSOVER_LAB, representation=ga.REPR_STRING, scoring=ga.SCORING_PAIRS,
+                     delta_scoring=False, selection=None, workers=None):
+
+    print("="*70)
+    print("GENETIC ALGORITHM - ISLAND MODEL")
+    print("="*70)
+    print(f"Configuration:")
+    print(f"  Islands: {num_islands} x {island_size} individuals")
+    print(f"  Max generations: {max_generations}")
+    print(f"  Migration: {num_migrants} individuals every {migration_interval} generations ({topology})")
+    print(f"  No improvement limit: {no_improvement_limit}")
+    print(f"  Sequences: {len(sequences)} (lengths: {[len(s) for s in sequences]})")
+    print()
+
+    if representation == ga.REPR_ARRAY:
+        sequences = enc.encode_sequences(sequences, ga.pa.sm.alphabet)
+    elif isinstance(sequences[0], np.ndarray):
+        sequences = [enc.decode_row(seq) for seq in sequences]
+
+    #* Uma ilha por processo (por omissão)
+    workers = workers or num_islands
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=ga.init_worker,
+                                   initargs=(ga.pa.sm, ga.pa.g, scoring))
+
+    seeds = [random.getrandbits(32) for _ in range(num_islands)]
+    populations = list(executor.map(init_island, [(sequences, island_size, max_offset, seed) for seed in seeds]))
+
+    histories = [[pop[0][1]] for pop in populations]
+    best_ever = max((pop[0] for pop in populations), key=lambda x: x[1])
+    generations_without_improvement = 0
+    generation = 0
+
+    print(f"Generation 0: Best score = {best_ever[1]}")
+
+    while generation < max_generations:
+        epoch = min(migration_interval, max_generations - generation)
+        tasks = [(pop, epoch, random.getrandbits(32), crossover, delta_scoring, selection) for pop in populations]
+        results = list(executor.map(evolve_island, tasks))
+        generation += epoch
+
+        populations = [pop for pop, _ in results]
+        for history, (_, island_history) in zip(histories, results):
+            history.extend(island_history)
+
+        best_current = max((pop[0] for pop in populations), key=lambda x: x[1])
+        print(f"Generation {generation}: " + " | ".join(f"island {k}: {pop[0][1]}" for k, pop in enumerate(populations)))
+
+        if best_current[1] > best_ever[1]:
+            print(f"NEW BEST SCORE: {best_current[1]:.2f} (+{best_current[1] - best_ever[1]:.2f})")
+            best_ever = best_current
+            generations_without_improvement = 0
+        else:
+            generations_without_improvement += epoch
+
+        if generations_without_improvement >= no_improvement_limit:
+            print(f"Stopping: No improvement for {generations_without_improvement} generations")
+            break
+
+        populations = migrate(populations, num_migrants, topology)
+
+    executor.shutdown()
+
+    print()
+    print("FINAL RESULT")
+    print(f"Best score found: {best_ever[1]}")
+    print(f"Generations executed: {generation}")
+    print()
+    print("Best alignment:")
+    ga.print_indv(best_ever[0])
+
+    best_alignment = best_ever[0]
+    if isinstance(best_alignment, np.ndarray):
+        best_alignment = enc.decode_alignment(best_alignment)
+
+    return best_alignment, best_ever[1], histories
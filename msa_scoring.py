@@ -0,0 +1,85 @@
+import hashlib
+from collections import OrderedDict
+import numpy as np
+
+
+class ProfileScorer:
+    #* Sum-of-pairs a partir das contagens de residuos por coluna.
+    #* Custo ~ colunas x alfabeto^2 em vez de sequencias^2 x colunas.
+    #* Assume matriz de substituicao simetrica (como a BLOSUM62).
+
+    def __init__(self, sm, g):
+        self.g = g
+        if sm.matrix is None:
+            sm.build_dense()
+
+        #* byte -> indice compacto (-1 para residuos desconhecidos), o gap é o ultimo indice
+        self.index = sm.index
+        #* Ultima linha/coluna é o gap, gap-residuo e gap-gap valem g (como no score_pos)
+        self.matrix = sm.with_gap(g)
+        self.diagonal = self.matrix.diagonal().copy()
+
+    def to_array(self, msa):
+        if isinstance(msa, np.ndarray):
+            return msa
+        return np.frombuffer(''.join(msa).encode('ascii'), dtype=np.uint8).reshape(len(msa), -1)
+
+    def column_counts(self, msa):
+        msa = self.to_array(msa)
+        codes = self.index[msa]
+        if (codes < 0).any():
+            bad = sorted(set(chr(c) for c in msa[codes < 0]))
+            raise KeyError(f"Residues not in substitution matrix: {bad}")
+        size = self.matrix.shape[0]
+        n_cols = msa.shape[1]
+        flat = codes + size * np.arange(n_cols)
+        return np.bincount(flat.ravel(), minlength=n_cols * size).reshape(n_cols, size)
+
+    def column_scores(self, msa):
+        counts = self.column_counts(msa)
+        #* c^T S c conta cada par duas vezes e inclui cada sequencia com ela propria
+        both = ((counts @ self.matrix) * counts).sum(axis=1) - counts @ self.diagonal
+        return both // 2
+
+    def score(self, msa):
+        return int(self.column_scores(msa).sum())
+
+
+class FitnessCache:
+    #* Cache LRU de scores indexada pelo conteudo do alinhamento
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def key(self, msa):
+        h = hashlib.blake2b(digest_size=16)
+        if isinstance(msa, np.ndarray):
+            h.update(np.asarray(msa.shape, dtype=np.int64).tobytes())
+            h.update(np.ascontiguousarray(msa).tobytes())
+        else:
+            h.update('\n'.join(msa).encode('ascii'))
+        return h.digest()
+
+    def get_or_compute(self, msa, score_function):
+        k = self.key(msa)
+        if k in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(k)
+            return self.entries[k]
+
+        self.misses += 1
+        score = score_function(msa)
+        self.entries[k] = score
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+        return score
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
@@ -1,8 +1,37 @@
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 from .pairwisealignment import PairwiseAlignment
 from .myalign import MyAlign
 from .myseq import MySeq
 from .substmatrix import SubstMatrix
 
+## aligner of each worker process, set once by init_worker
+worker_alignpars = None
+
+def init_worker(alignpars):
+    global worker_alignpars
+    worker_alignpars = alignpars
+
+def merge_task(task):
+    return merge_rows(worker_alignpars, *task)
+
+def row_counts(alignpars, rows):
+    ## residue counts per column (gap last) of a byte matrix of rows
+    index, mat = alignpars.score_table()
+    n_codes = mat.shape[0]
+    codes = index[rows] + n_codes * np.arange(rows.shape[1])
+    return np.bincount(codes.ravel(), minlength=rows.shape[1] * n_codes).reshape(rows.shape[1], n_codes)
+
+def merge_rows(alignpars, rows1, rows2):
+    ## profile-profile alignment of two blocks of aligned rows, returns the merged block
+    alignpars.needleman_Wunsch_profiles(row_counts(alignpars, rows1), row_counts(alignpars, rows2))
+    moves, _, _ = alignpars.trace_moves(rows1.shape[1], rows2.shape[1])
+    moves = np.array(moves, dtype=np.uint8)
+    res = np.full((len(rows1) + len(rows2), len(moves)), ord("-"), dtype=np.uint8)
+    res[:len(rows1), moves != 3] = rows1
+    res[len(rows1):, moves != 2] = rows2
+    return res
+
 class MultipleAlignment():
     def __init__(self, seqs, alignseq):
         self.seqs = seqs
@@ -29,14 +58,116 @@ class MultipleAlignment():
         res[len(alignment.listseqs)] = align2.listseqs[1]
         return MyAlign(res, alignment.al_type)
 
-    def align_consensus(self):
+    def align_consensus(self, profile = False):
+        ## same result as merging with add_seq_alignment, but the rows are a byte matrix and
+        ## the column profile is updated as each sequence is added instead of being rebuilt.
+        ## With profile = True each sequence is aligned against the whole profile
         self.alignpars.needleman_Wunsch(self.seqs[0], self.seqs[1])
         res = self.alignpars.recover_align()
         #print(res)
+        state = self.profile_of(res)
         for i in range(2, len(self.seqs)):
-            res = self.add_seq_alignment(res, self.seqs[i])
-            #print(res)
-        return res
+            self.add_seq_profile(state, self.seqs[i], res.al_type, profile)
+        rows = state[0]
+        return MyAlign([r.tobytes().decode("ascii") for r in rows], res.al_type)
+
+    def align_guide_tree(self, tree, workers = 1):
+        ## progressive alignment along a guide tree (nodes with value / left / right, leaves hold
+        ## the index of the sequence, like the UPGMA BinaryTree). A node is merged as soon as
+        ## both children are aligned, so independent subtrees run in parallel with workers > 1.
+        ## Rows come back in the order of self.seqs
+        parent = {}
+        ready = []
+        done = {}
+        stack = [tree]
+        while stack:
+            node = stack.pop()
+            if node.value >= 0:
+                seq = str(self.seqs[node.value])
+                done[id(node)] = ([node.value], np.frombuffer(seq.encode("ascii"), dtype=np.uint8)[None, :])
+            else:
+                for child in (node.left, node.right):
+                    parent[id(child)] = node
+                    stack.append(child)
+                if node.left.value >= 0 and node.right.value >= 0: ready.append(node)
+        executor = None
+        if workers > 1:
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(self.alignpars,))
+        pending = {}
+        while ready or pending:
+            finished = []
+            for node in ready:
+                ids1, rows1 = done.pop(id(node.left))
+                ids2, rows2 = done.pop(id(node.right))
+                if executor is None:
+                    finished.append((node, ids1 + ids2, merge_rows(self.alignpars, rows1, rows2)))
+                else:
+                    pending[executor.submit(merge_task, (rows1, rows2))] = (node, ids1 + ids2)
+            ready = []
+            if pending:
+                completed, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for f in completed:
+                    node, ids = pending.pop(f)
+                    finished.append((node, ids, f.result()))
+            for node, ids, rows in finished:
+                done[id(node)] = (ids, rows)
+                up = parent.get(id(node))
+                if up is not None and id(up.left) in done and id(up.right) in done: ready.append(up)
+        if executor is not None: executor.shutdown()
+        ids, rows = done[id(tree)]
+        order = np.argsort(ids)
+        return MyAlign([rows[k].tobytes().decode("ascii") for k in order], self.seqs[0].seq_type)
+
+    def profile_of(self, alignment):
+        ## rows as bytes, counts per column and residue code (gap last) and, for consensus
+        ## ties, the first row holding each residue in each column
+        rows = np.array([np.frombuffer(s.encode("ascii"), dtype=np.uint8) for s in alignment.listseqs])
+        index, mat = self.alignpars.score_table()
+        codes = index[rows]
+        n_codes = mat.shape[0]
+        counts = np.zeros((rows.shape[1], n_codes), dtype=np.int64)
+        first = np.full((rows.shape[1], n_codes), len(rows), dtype=np.int64)
+        cols = np.arange(rows.shape[1])
+        for k in range(len(rows) - 1, -1, -1):
+            counts[cols, codes[k]] += 1
+            first[cols, codes[k]] = k
+        return [rows, counts, first]
+
+    def profile_consensus(self, counts, first, n_rows):
+        ## most frequent residue of each column, ties to the one seen first (like MyAlign.consensus)
+        key = counts[:, :-1] * (n_rows + 1) + (n_rows - first[:, :-1])
+        letters = np.frombuffer("".join(self.alignpars.sm.alphabet).encode("ascii"), dtype=np.uint8)
+        return letters[np.argmax(key, axis=1)].tobytes().decode("ascii")
+
+    def add_seq_profile(self, state, seq, al_type, profile = False):
+        rows, counts, first = state
+        k = len(rows)
+        if profile:
+            self.alignpars.needleman_Wunsch_profile(counts, seq)
+        else:
+            cons = MySeq(self.profile_consensus(counts, first, k), al_type)
+            self.alignpars.needleman_Wunsch(cons, seq)
+        moves, _, _ = self.alignpars.trace_moves(len(counts), len(seq))
+        moves = np.array(moves, dtype=np.uint8)
+        ## columns where the profile has a gap are new; the others keep their counts
+        old = moves != 3
+        n_cols = len(moves)
+        gap = counts.shape[1] - 1
+        new_rows = np.full((k+1, n_cols), ord("-"), dtype=np.uint8)
+        new_rows[:k, old] = rows
+        seq_bytes = np.frombuffer(str(seq).encode("ascii"), dtype=np.uint8)
+        new_rows[k, moves != 2] = seq_bytes
+        new_counts = np.zeros((n_cols, counts.shape[1]), dtype=np.int64)
+        new_counts[old] = counts
+        new_counts[~old, gap] = k
+        new_first = np.full((n_cols, counts.shape[1]), k+1, dtype=np.int64)
+        new_first[old] = np.where(counts > 0, first, k+1)
+        index, _ = self.alignpars.score_table()
+        codes = index[new_rows[k]]
+        cols = np.arange(n_cols)
+        new_counts[cols, codes] += 1
+        new_first[cols, codes] = np.minimum(new_first[cols, codes], k)
+        state[:] = [new_rows, new_counts, new_first]
     
 def testMSA():
     s1 = MySeq("ATATCCG")
@@ -1,11 +1,15 @@
+import heapq
+import numpy as np
 from .myalign import MyAlign
 from .myseq import MySeq
 from .substmatrix import SubstMatrix
 
 class PairwiseAlignment:
-    def __init__(self, sm, g):
+    def __init__(self, sm, g, pack_above = 2**22):
+        ## tracebacks with more than pack_above cells are stored 2 bits per cell
         self.g = g
         self.sm = sm
+        self.pack_above = pack_above
         self.S = None
         self.T = None
         self.seq1 = None
@@ -18,10 +22,10 @@ class PairwiseAlignment:
             return self.sm.sm[c1+c2]
         
     def score_align(self):
-        res = 0
-        for i in range(len(self.seq1)):
-            res += self.score_pos(self.seq1[i], self.seq2[i])
-        return res
+        ## whole rows looked up at once in the dense table (gap penalty included)
+        c1 = self.sm.encode(self.seq1)
+        c2 = self.sm.encode(self.seq2)[:len(c1)]
+        return int(self.sm.scores(c1, c2, self.g).sum())
     
     def max3t(self, v1, v2, v3):
         if v1 > v2:
@@ -31,7 +35,90 @@ class PairwiseAlignment:
             if v2 > v3: return 2
             else: return 3
     
+    def score_table(self):
+        ## byte -> index translation and dense score matrix, gap is the last index
+        if self.sm.matrix is None: self.sm.build_dense()
+        return self.sm.index, self.sm.with_gap(self.g)
+
+    def encode(self, seq):
+        return self.sm.encode(seq)
+
+    def fill(self, seq1, seq2, local = False):
+        _, mat = self.score_table()
+        c1 = self.encode(seq1)
+        profile = mat[:, self.encode(seq2)]
+        n = len(c1); m = profile.shape[1]
+        if local:
+            S = self.fill_rows(np.zeros(m+1, dtype=np.int64), c1, profile, np.zeros(n, dtype=np.int64), local = True)
+        else:
+            S = self.fill_rows(self.g * np.arange(m+1), c1, profile, self.g * np.arange(1, n+1))
+        packed = self.pack_above is not None and (n+1) * (m+1) > self.pack_above
+        T = self.pointers(S, c1, profile, local, packed)
+        return S, T
+
+    def fill_rows(self, top, c1, profile, col0, local = False, keep = True):
+        ## fills the rows below 'top' one row at a time; with U[i][j] = S[i][j] - j*g the
+        ## horizontal gap recurrence S[i][j] = max(b[j], S[i][j-1] + g) is a running maximum
+        ## keep = False only keeps two rows and returns the last one
+        g = self.g
+        n = len(c1); m = profile.shape[1]
+        ## 32 bit scores whenever no cell can overflow them (float scores stay float)
+        if profile.dtype.kind == "f":
+            dtype = np.float64
+        else:
+            maxabs = max(abs(g), int(np.abs(profile).max(initial=0)), int(np.abs(top).max(initial=0)))
+            dtype = np.int32 if (n + m + 2) * 2 * maxabs < 2**31 else np.int64
+        jg = g * np.arange(m+1)
+        diag = (profile - g).astype(dtype)
+        U = np.empty((n+1 if keep else 2, m+1), dtype=dtype)
+        U[0] = top - jg
+        prev = U[0]
+        b = np.empty(m+1, dtype=dtype)
+        up = np.empty(m, dtype=dtype)
+        for i in range(n):
+            cur = U[i+1] if keep else U[(i+1) % 2]
+            np.add(prev[:-1], diag[c1[i]], out=b[1:])
+            np.add(prev[1:], g, out=up)
+            np.maximum(b[1:], up, out=b[1:])
+            if local: np.maximum(b[1:], -jg[1:], out=b[1:])
+            b[0] = col0[i]
+            np.maximum.accumulate(b, out=cur)
+            prev = cur
+        if not keep:
+            return prev + jg
+        U += jg
+        return U
+
+    def pointers(self, S, c1, profile, local = False, packed = False):
+        ## traceback pointers with the same tie-breaking as max3t, a block of rows at a time
+        ## (uint8 matrix, or PackedMatrix with four cells per byte)
+        g = self.g
+        n = S.shape[0] - 1; m = S.shape[1] - 1
+        T = PackedMatrix(n+1, m+1) if packed else np.zeros((n+1, m+1), dtype=np.uint8)
+        row0 = np.zeros((1, m+1), dtype=np.uint8)
+        if not local: row0[0, 1:] = 3
+        T[0:1] = row0
+        step = max(1, 2**20 // (m+1))
+        for i0 in range(0, n, step):
+            i1 = min(n, i0 + step)
+            s1 = S[i0:i1, :-1] + profile[c1[i0:i1]]
+            s2 = S[i0:i1, 1:] + g
+            s3 = S[i0+1:i1+1, :-1] + g
+            t = np.empty((i1 - i0, m+1), dtype=np.uint8)
+            t[:, 0] = 0 if local else 2
+            t[:, 1:] = np.where(s1 > s2, np.where(s1 > s3, 1, 3), np.where(s2 > s3, 2, 3))
+            if local: t[:, 1:][S[i0+1:i1+1, 1:] <= 0] = 0
+            T[i0+1:i1+1] = t
+        return T
+
     def needleman_Wunsch(self, seq1, seq2):
+        if (seq1.seq_type != seq2.seq_type): return None
+        self.seq1 = seq1
+        self.seq2 = seq2
+        self.S, self.T = self.fill(seq1, seq2)
+        return int(self.S[len(seq1), len(seq2)])
+
+    def needleman_Wunsch_python(self, seq1, seq2):
         if (seq1.seq_type != seq2.seq_type): return None
         self.seq1 = seq1
         self.seq2 = seq2
@@ -55,26 +142,360 @@ class PairwiseAlignment:
                 self.T[i+1].append(self.max3t(s1, s2, s3))
         return self.S[len(self.seq1)][len(self.seq2)]
     
-    def recover_align(self):
-        res = ["", ""]
-        i = len(self.seq1); j = len(self.seq2)
-        while i>0 or j>0:
-            if self.T[i][j] == 1:
-                res[0] = self.seq1[i-1] + res[0]
-                res[1] = self.seq2[j-1] + res[1]
-                i -= 1
-                j -= 1
-            elif self.T[i][j] == 3:
-                res[0] = "-" + res[0]
-                res[1] = self.seq2[j-1] + res[1]
-                j -= 1
+    def align_many(self, pairs, alignments = False, lane_cells = 2**22, differences = False):
+        ## global scores of many (seq1, seq2) pairs, in input order (None for type mismatch).
+        ## Pairs sorted by length are padded into lanes and their rows are filled together;
+        ## with alignments = True each entry is (score, MyAlign) like needleman_Wunsch + recover_align,
+        ## with differences = True it is (score, number of differing columns)
+        _, mat = self.score_table()
+        pad = mat.shape[0] - 1
+        results = [None] * len(pairs)
+        valid = [k for k, (s1, s2) in enumerate(pairs) if s1.seq_type == s2.seq_type]
+        codes = {k: (self.encode(pairs[k][0]), self.encode(pairs[k][1])) for k in valid}
+        valid.sort(key = lambda k: (len(codes[k][0]), len(codes[k][1])), reverse = True)
+        start = 0
+        while start < len(valid):
+            n_max = len(codes[valid[start]][0]); m_max = len(codes[valid[start]][1])
+            end = start + 1
+            while end < len(valid):
+                n, m = len(codes[valid[end]][0]), len(codes[valid[end]][1])
+                m_lane = max(m_max, m)
+                ## similar lengths only, and a bounded number of cells per lane
+                if (end - start + 1) * (n_max + 1) * (m_lane + 1) > lane_cells: break
+                if 2 * (n + 1) * (m + 1) < (n_max + 1) * (m_lane + 1): break
+                m_max = m_lane; end += 1
+            lane = valid[start:end]
+            self.align_lane(lane, codes, mat, pad, n_max, m_max, alignments or differences, pairs, results, differences)
+            start = end
+        return results
+
+    def align_lane(self, lane, codes, mat, pad, n_max, m_max, alignments, pairs, results, differences = False):
+        ## one stacked (pairs x columns) row per step; padding never reaches a pair's own cells
+        g = self.g
+        B = len(lane)
+        c1 = np.full((B, n_max), pad, dtype=np.int64)
+        c2 = np.full((B, m_max), pad, dtype=np.int64)
+        for b, k in enumerate(lane):
+            c1[b, :len(codes[k][0])] = codes[k][0]
+            c2[b, :len(codes[k][1])] = codes[k][1]
+        lens1 = np.array([len(codes[k][0]) for k in lane])
+        lens2 = np.array([len(codes[k][1]) for k in lane])
+        jg = g * np.arange(m_max+1)
+        U = np.empty((n_max+1 if alignments else 2, B, m_max+1), dtype=np.int64)
+        U[0] = 0
+        prev = U[0]
+        last = np.empty((B, m_max+1), dtype=np.int64)
+        last[lens1 == 0] = prev[lens1 == 0]
+        b = np.empty((B, m_max+1), dtype=np.int64)
+        lane_range = np.arange(B)
+        for i in range(n_max):
+            cur = U[i+1] if alignments else U[(i+1) % 2]
+            np.add(prev[:, :-1], mat[c1[:, i][:, None], c2] - g, out=b[:, 1:])
+            np.maximum(b[:, 1:], prev[:, 1:] + g, out=b[:, 1:])
+            b[:, 0] = g * (i+1)
+            np.maximum.accumulate(b, axis=1, out=cur)
+            done = lens1 == i+1
+            if done.any(): last[done] = cur[done]
+            prev = cur
+        scores = last[lane_range, lens2] + jg[lens2]
+        for b, k in enumerate(lane):
+            if not alignments:
+                results[k] = int(scores[b])
+                continue
+            n = lens1[b]; m = lens2[b]
+            S = U[:n+1, b, :m+1] + jg[:m+1]
+            self.seq1, self.seq2 = pairs[k]
+            self.S = S
+            packed = self.pack_above is not None and (n+1) * (m+1) > self.pack_above
+            self.T = self.pointers(S, codes[k][0], mat[:, codes[k][1]], packed = packed)
+            results[k] = (int(scores[b]), self.differences() if differences else self.recover_align())
+
+    def needleman_Wunsch_profile(self, counts, seq2):
+        ## global alignment of a column profile (residue counts per column, gap count last)
+        ## against seq2: a column scores the average of its rows against the residue, gaps at g.
+        ## Only S and T are kept, trace_moves(len(counts), len(seq2)) gives the alignment
+        _, mat = self.score_table()
+        c2 = self.encode(seq2)
+        self.seq1 = None
+        self.seq2 = seq2
+        return self.fill_profile((counts @ mat[:, c2]) / counts[0].sum())
+
+    def needleman_Wunsch_profiles(self, counts1, counts2):
+        ## profile-profile version: columns score the average over all pairs of their rows
+        _, mat = self.score_table()
+        self.seq1 = None
+        self.seq2 = None
+        return self.fill_profile((counts1 @ mat @ counts2.T) / (counts1[0].sum() * counts2[0].sum()))
+
+    def fill_profile(self, prof):
+        ## prof[i, j]: score of column i of the first profile against position j of the second
+        n, m = prof.shape
+        rows = np.arange(n)
+        self.S = self.fill_rows(self.g * np.arange(m+1), rows, prof, self.g * np.arange(1, n+1))
+        self.T = self.pointers(self.S, rows, prof)
+        return float(self.S[n, m])
+
+    def needleman_Wunsch_score(self, seq1, seq2):
+        ## optimal global score in linear memory, no traceback is kept
+        if (seq1.seq_type != seq2.seq_type): return None
+        _, mat = self.score_table()
+        c1 = self.encode(seq1)
+        profile = mat[:, self.encode(seq2)]
+        m = profile.shape[1]
+        last = self.fill_rows(self.g * np.arange(m+1), c1, profile, self.g * np.arange(1, len(c1)+1), keep = False)
+        return int(last[m])
+
+    def hirschberg(self, seq1, seq2, block_cells = 2**22):
+        ## linear memory global alignment; gives the same MyAlign as needleman_Wunsch + recover_align
+        if (seq1.seq_type != seq2.seq_type): return None
+        self.seq1 = seq1
+        self.seq2 = seq2
+        _, mat = self.score_table()
+        c1 = self.encode(seq1)
+        profile = mat[:, self.encode(seq2)]
+        n = len(c1); m = profile.shape[1]
+        moves = []
+        j = self.trace_linear(self.g * np.arange(m+1), 0, n, m, c1, profile, moves, block_cells)
+        moves.extend([3] * j)
+        moves.reverse()
+        return self.moves_to_align(moves)
+
+    def trace_linear(self, top, r0, r1, e, c1, profile, moves, block_cells):
+        ## follows the needleman_Wunsch traceback from (r1, e) up to row r0, whose true scores
+        ## are in 'top'; appends the moves and returns the column where row r0 is reached.
+        ## The lower half is traced first from the true middle row (forward pass only), then
+        ## the upper half down to the column found, so ties are broken exactly like T
+        if r1 == r0: return e
+        g = self.g
+        if (r1 - r0) * (e + 1) <= block_cells or r1 - r0 == 1:
+            S = self.fill_rows(top[:e+1], c1[r0:r1], profile[:, :e], g * np.arange(r0+1, r1+1))
+            T = self.pointers(S, c1[r0:r1], profile[:, :e])
+            i = r1 - r0; j = e
+            while i > 0:
+                t = T[i, j]
+                moves.append(t)
+                if t == 1:
+                    i -= 1; j -= 1
+                elif t == 3: j -= 1
+                else: i -= 1
+            return j
+        mid = (r0 + r1) // 2
+        row_mid = self.fill_rows(top[:e+1], c1[r0:mid], profile[:, :e], g * np.arange(r0+1, mid+1), keep = False)
+        j = self.trace_linear(row_mid, mid, r1, e, c1, profile, moves, block_cells)
+        return self.trace_linear(top, r0, mid, j, c1, profile, moves, block_cells)
+
+    def moves_to_align(self, moves, i = 0, j = 0):
+        ## builds both rows from the moves (in forward order) starting at cell (i, j)
+        s1 = str(self.seq1); s2 = str(self.seq2)
+        res = [[], []]
+        for t in moves:
+            if t == 1:
+                res[0].append(s1[i]); res[1].append(s2[j])
+                i += 1; j += 1
+            elif t == 3:
+                res[0].append("-"); res[1].append(s2[j])
+                j += 1
+            else:
+                res[0].append(s1[i]); res[1].append("-")
+                i += 1
+        return MyAlign(["".join(res[0]), "".join(res[1])], self.seq1.seq_type)
+
+    def needleman_Wunsch_banded(self, seq1, seq2, w = 16):
+        ## fills only the diagonals lo..hi (j - i) around the main diagonal, doubling w until
+        ## no path leaving the band can reach the banded score (then S/T on the traced path
+        ## are the same as in the full matrix); falls back to needleman_Wunsch when the band
+        ## would cover the whole matrix. S and T are BandedMatrix, so recover_align works as usual
+        if (seq1.seq_type != seq2.seq_type): return None
+        _, mat = self.score_table()
+        c1 = self.encode(seq1); c2 = self.encode(seq2)
+        n = len(c1); m = len(c2)
+        while True:
+            lo = min(0, m - n) - w
+            hi = max(0, m - n) + w
+            if lo <= -n and hi >= m or self.g >= 0:
+                return self.needleman_Wunsch(seq1, seq2)
+            S, T = self.fill_band(c1, c2, mat, lo, hi)
+            score = int(S[n, m - n - lo])
+            if score > self.band_exit_bound(S, c1, c2, mat, lo, hi):
+                break
+            w *= 2
+        self.seq1 = seq1
+        self.seq2 = seq2
+        self.S = BandedMatrix(S, lo)
+        self.T = BandedMatrix(T, lo)
+        return score
+
+    def band_exit_bound(self, S, c1, c2, mat, lo, hi):
+        ## upper bound for any global path that leaves the band: the part before its first
+        ## exit is inside the band (at most S there), the exit is a gap, and afterwards each
+        ## remaining residue of the other sequence scores at most its best match (or g) and
+        ## at least |exit diagonal - (m - n)| further gaps are needed to reach (n, m)
+        g = self.g
+        n = len(c1); m = len(c2)
+        best1 = np.maximum(mat[c1][:, np.unique(c2)].max(axis=1), g) if n and m else np.zeros(n, dtype=np.int64)
+        best2 = np.maximum(mat[np.unique(c1)][:, c2].max(axis=0), g) if n and m else np.zeros(m, dtype=np.int64)
+        suffix1 = np.concatenate((np.cumsum(best1[::-1])[::-1], [0]))
+        suffix2 = np.concatenate((np.cumsum(best2[::-1])[::-1], [0]))
+        bound = -np.inf
+        ## leaving through diagonal hi + 1: horizontal step from (i, i + hi)
+        i = np.arange(n+1)
+        ok = (i + hi >= 0) & (i + hi < m)
+        if ok.any():
+            i = i[ok]
+            ub = S[i, hi - lo] + g + suffix2[i + hi + 1] + g * (hi + 1 - (m - n))
+            bound = max(bound, ub.max())
+        ## leaving through diagonal lo - 1: vertical step from (i, i + lo)
+        i = np.arange(n)
+        ok = (i + lo >= 0) & (i + lo <= m)
+        if ok.any():
+            i = i[ok]
+            ub = S[i, 0] + g + suffix1[i + 1] + g * ((m - n) - (lo - 1))
+            bound = max(bound, ub.max())
+        return bound
+
+    def fill_band(self, c1, c2, mat, lo, hi):
+        ## band row i, slot k holds cell (i, i + lo + k); the diagonal predecessor is slot k of
+        ## row i-1 and the upper one slot k+1. Same U = S - j*g running maximum as fill_rows
+        g = self.g
+        n = len(c1); m = len(c2)
+        W = hi - lo + 1
+        neg = np.iinfo(np.int64).min // 4
+        J = np.arange(n+1)[:, None] + lo + np.arange(W)[None, :]
+        valid = (J >= 0) & (J <= m)
+        c2p = np.concatenate(([0], c2))
+        sub = mat[c1[:, None], c2p[np.clip(J[1:], 0, m)]]
+        diag = sub - g
+        U = np.full((n+1, W), neg, dtype=np.int64)
+        U[0, valid[0]] = 0
+        b = np.empty(W, dtype=np.int64)
+        up = np.full(W, neg, dtype=np.int64)
+        for i in range(1, n+1):
+            prev = U[i-1]
+            np.add(prev, diag[i-1], out=b)
+            np.add(prev[1:], g, out=up[:-1])
+            np.maximum(b, up, out=b)
+            k0 = -i - lo
+            if 0 <= k0 < W: b[k0] = g * i
+            np.maximum.accumulate(b, out=U[i])
+        S = np.where(valid, U + J * g, neg)
+        ## traceback pointers with max3t tie-breaking
+        s1 = S[:-1] + sub
+        s2 = np.full((n, W), neg, dtype=np.int64)
+        s2[:, :-1] = S[:-1, 1:] + g
+        s3 = np.full((n, W), neg, dtype=np.int64)
+        s3[:, 1:] = S[1:, :-1] + g
+        T = np.zeros((n+1, W), dtype=np.uint8)
+        T[1:] = np.where(s1 > s2, np.where(s1 > s3, 1, 3), np.where(s2 > s3, 2, 3))
+        T[0] = 3
+        T[J == 0] = 2
+        T[0, -lo] = 0
+        T[~valid] = 0
+        return S, T
+
+    def pointer_getter(self):
+        T = self.T
+        if isinstance(T, np.ndarray): return T.item
+        if hasattr(T, "pointer"): return T.pointer
+        return lambda i, j: T[i][j]
+
+    def trace_moves(self, i, j, local = False):
+        ## moves from (i, j) back to the start, collected in a list and reversed once
+        pointer = self.pointer_getter()
+        moves = []
+        while True:
+            t = pointer(i, j)
+            if local:
+                if t == 0: break
+            elif i == 0 and j == 0: break
+            if t == 1:
+                i -= 1; j -= 1
+            elif t == 3: j -= 1
             else:
-                res[0] = self.seq1[i-1] + res[0]
-                res[1] = "-" + res[1]
                 i -= 1
-        return MyAlign(res, self.seq1.seq_type)
+                t = 2
+            moves.append(t)
+        moves.reverse()
+        return moves, i, j
+
+    def differences(self):
+        ## differing columns of the last global alignment, counted on the traceback moves:
+        ## every gap plus every mismatching diagonal step
+        moves, _, _ = self.trace_moves(len(self.seq1), len(self.seq2))
+        moves = np.array(moves, dtype=np.uint8)
+        diag = moves == 1
+        b1 = np.frombuffer(str(self.seq1).encode("ascii"), dtype=np.uint8)
+        b2 = np.frombuffer(str(self.seq2).encode("ascii"), dtype=np.uint8)
+        i = np.cumsum(moves != 3)[diag] - 1
+        j = np.cumsum(moves != 2)[diag] - 1
+        return int(len(moves) - diag.sum() + (b1[i] != b2[j]).sum())
+
+    def recover_align(self):
+        moves, i, j = self.trace_moves(len(self.seq1), len(self.seq2))
+        return self.moves_to_align(moves, i, j)
     
     def smith_Waterman(self, seq1, seq2):
+        if (seq1.seq_type != seq2.seq_type): return None
+        self.seq1 = seq1
+        self.seq2 = seq2
+        self.S, self.T = self.fill(seq1, seq2, local = True)
+        ## first maximum in row order, like the strict '>' of the cell by cell version
+        ## (0, 0) when no cell is positive
+        maxrow, maxcol = np.unravel_index(int(np.argmax(self.S)), self.S.shape)
+        return (int(maxrow), int(maxcol))
+
+    def query_profile(self, query):
+        ## score of every residue code against each query position, built once per query
+        _, mat = self.score_table()
+        return mat[:, self.encode(query)]
+
+    def local_best(self, c1, profile):
+        ## best local score with only two rows kept (query along the columns)
+        g = self.g
+        m = profile.shape[1]
+        jg = g * np.arange(m+1)
+        diag = profile - g
+        prev = np.zeros(m+1, dtype=np.int64) - jg
+        cur = np.empty(m+1, dtype=np.int64)
+        b = np.empty(m+1, dtype=np.int64)
+        best = 0
+        for i in range(len(c1)):
+            np.add(prev[:-1], diag[c1[i]], out=b[1:])
+            np.maximum(b[1:], prev[1:] + g, out=b[1:])
+            np.maximum(b[1:], -jg[1:], out=b[1:])
+            b[0] = 0
+            np.maximum.accumulate(b, out=cur)
+            best = max(best, int((cur + jg).max()))
+            prev, cur = cur, prev
+        return best
+
+    def smith_Waterman_score(self, seq1, seq2):
+        if (seq1.seq_type != seq2.seq_type): return None
+        return self.local_best(self.encode(seq1), self.query_profile(seq2))
+
+    def search(self, query, targets, k = 10):
+        ## scans targets (strings from read_fasta or MySeq) with score only local alignment and
+        ## keeps the k best; returns (score, target index, MyAlign) best first, ties by index
+        ## (only targets with a positive local score, so possibly fewer than k hits)
+        if k <= 0: return []
+        if not isinstance(query, MySeq): query = MySeq(query, "PROTEIN")
+        profile = self.query_profile(query)
+        heap = []
+        for idx, target in enumerate(targets):
+            if not isinstance(target, MySeq): target = MySeq(target, query.seq_type)
+            if target.seq_type != query.seq_type: continue
+            item = (self.local_best(self.encode(target), profile), -idx)
+            if item[0] <= 0: continue
+            if len(heap) < k: heapq.heappush(heap, item)
+            elif item > heap[0]: heapq.heapreplace(heap, item)
+        hits = []
+        for score, idx in sorted(heap, reverse = True):
+            target = targets[-idx]
+            if not isinstance(target, MySeq): target = MySeq(target, query.seq_type)
+            i, j = self.smith_Waterman(query, target)
+            hits.append((score, -idx, self.recover_align_local(i, j)))
+        return hits
+
+    def smith_Waterman_python(self, seq1, seq2):
         if (seq1.seq_type != seq2.seq_type): return None
         self.seq1 = seq1
         self.seq2 = seq2
@@ -102,22 +523,8 @@ class PairwiseAlignment:
         return (maxrow, maxcol)
     
     def recover_align_local(self, i, j):
-        res = ["", ""] 
-        while self.T[i][j]>0:
-            if self.T[i][j] == 1:
-                res[0] = self.seq1[i-1] + res[0]
-                res[1] = self.seq2[j-1] + res[1]
-                i -= 1
-                j -= 1
-            elif self.T[i][j] == 3:
-                res[0] = "-" + res[0]
-                res[1] = self.seq2[j-1] + res[1]
-                j -= 1
-            elif self.T[i][j] == 2:
-                res[0] = self.seq1[i-1] + res[0]
-                res[1] = "-" + res[1]
-                i -= 1
-        return MyAlign(res, self.seq1.seq_type)
+        moves, i, j = self.trace_moves(i, j, local = True)
+        return self.moves_to_align(moves, i, j)
     
 def testGlobal():
     submat = SubstMatrix()
@@ -142,4 +549,103 @@ def testLocal():
     print("Sequences to align:", seq1, seq2)
     print("Score of optimal alignment:", pa.S[i][j])
     print("Optimal alignment:",align)
-    
+
+def random_pair(rng, alphabet, max_len = 40):
+    ## seq2 is a mutated copy of seq1, so local alignments always have a positive cell
+    seq1 = "".join(rng.choice(list(alphabet), size = rng.integers(5, max_len + 1)))
+    seq2 = ""
+    for c in seq1:
+        r = rng.random()
+        if r < 0.1: continue
+        seq2 += rng.choice(list(alphabet)) if r < 0.3 else c
+        if rng.random() < 0.1: seq2 += rng.choice(list(alphabet))
+    return MySeq(seq1, "PROTEIN"), MySeq(seq2, "PROTEIN")
+
+def pointer_array(T):
+    if isinstance(T, PackedMatrix): return T.unpack()
+    return np.asarray(T)
+
+def testVectorized(npairs = 100, seed = 0):
+    ## vectorized fills (plain and 2 bit packed tracebacks) against the cell by cell versions:
+    ## same S and T matrices, scores and recovered alignments
+    submat = SubstMatrix()
+    submat.read_submat_file("blosum62.mat")
+    rng = np.random.default_rng(seed)
+    ref = PairwiseAlignment(submat, -8)
+    engines = [PairwiseAlignment(submat, -8), PairwiseAlignment(submat, -8, pack_above = 0)]
+    for _ in range(npairs):
+        seq1, seq2 = random_pair(rng, submat.alphabet)
+        score = ref.needleman_Wunsch_python(seq1, seq2)
+        S, T, align = ref.S, ref.T, str(ref.recover_align())
+        for pa in engines:
+            assert pa.needleman_Wunsch(seq1, seq2) == score, (seq1, seq2)
+            assert np.array_equal(pa.S, S) and np.array_equal(pointer_array(pa.T), T), (seq1, seq2)
+            assert str(pa.recover_align()) == align, (seq1, seq2)
+        (i, j) = ref.smith_Waterman_python(seq1, seq2)
+        S, T, align = ref.S, ref.T, str(ref.recover_align_local(i, j))
+        for pa in engines:
+            assert pa.smith_Waterman(seq1, seq2) == (i, j), (seq1, seq2)
+            assert np.array_equal(pa.S, S) and np.array_equal(pointer_array(pa.T), T), (seq1, seq2)
+            assert str(pa.recover_align_local(i, j)) == align, (seq1, seq2)
+    print(npairs, "random pairs: needleman_Wunsch and smith_Waterman match the python versions")
+
+
+class BandedMatrix:
+    ## (n+1) x W band stored by diagonal offset; matrix[i][j] reads cell (i, j) like a full matrix
+    def __init__(self, data, lo, fill = 0):
+        self.data = data
+        self.lo = lo
+        self.fill = fill
+
+    def __getitem__(self, i):
+        return BandedRow(self.data[i], i + self.lo, self.fill)
+
+    def pointer(self, i, j):
+        k = j - i - self.lo
+        if 0 <= k < self.data.shape[1]: return self.data.item(i, k)
+        return self.fill
+
+
+class BandedRow:
+    def __init__(self, row, start, fill):
+        self.row = row
+        self.start = start
+        self.fill = fill
+
+    def __getitem__(self, j):
+        k = j - self.start
+        if 0 <= k < len(self.row): return self.row[k]
+        return self.fill
+
+
+class PackedMatrix:
+    ## 2 bit traceback pointers (values 0..3), four cells per byte
+    def __init__(self, rows, cols):
+        self.shape = (rows, cols)
+        self.data = np.zeros((rows, (cols + 3) // 4), dtype=np.uint8)
+
+    def __setitem__(self, rows, block):
+        block = np.asarray(block, dtype=np.uint8)
+        pad = (-block.shape[1]) % 4
+        b = np.pad(block, ((0, 0), (0, pad))).reshape(block.shape[0], -1, 4)
+        self.data[rows] = b[..., 0] | (b[..., 1] << 2) | (b[..., 2] << 4) | (b[..., 3] << 6)
+
+    def pointer(self, i, j):
+        return (self.data.item(i, j >> 2) >> ((j & 3) << 1)) & 3
+
+    def __getitem__(self, i):
+        return PackedRow(self, i)
+
+    def unpack(self):
+        d = self.data
+        full = np.stack((d & 3, (d >> 2) & 3, (d >> 4) & 3, d >> 6), axis=-1).reshape(d.shape[0], -1)
+        return full[:, :self.shape[1]]
+
+
+class PackedRow:
+    def __init__(self, matrix, i):
+        self.matrix = matrix
+        self.i = i
+
+    def __getitem__(self, j):
+        return self.matrix.pointer(self.i, j)
@@ -1,8 +1,14 @@
+import os
+import numpy as np
+
 class SubstMatrix:
 
     def __init__(self):
         self.alphabet = ""
         self.sm = {}
+        self.matrix = None
+        self.index = None
+        self.gap_tables = {}
 
     def __getitem__(self, ij):
         i, j = ij
@@ -12,7 +18,7 @@ class SubstMatrix:
         if c1 not in self.alphabet or c2 not in self.alphabet:
             return None
         return self.sm[c1+c2]
-    
+
     def create_submat(self, match, mismatch, alphabet):
         self.sm = {}
         self.alphabet = alphabet
@@ -22,8 +28,12 @@ class SubstMatrix:
                     self.sm[c1+c2] = match
                 else:
                     self.sm[c1+c2] = mismatch
-    
-    def read_submat_file(self, filename, sep = "\t"):
+        self.build_dense()
+
+    def read_submat_file(self, filename, sep = "\t", cache = False):
+        ## with cache = True the parsed matrix is kept in filename + ".npy" and reused
+        ## while it is newer than the text file
+        if cache and self.load_cache(filename): return
         self.sm = {}
         f = open(filename ,"r")
         line = f.readline()
@@ -37,4 +47,63 @@ class SubstMatrix:
             tokens = line.split(sep)
             for j in range(0, len(tokens)):
                 k = self.alphabet[i]+self.alphabet[j]
-                self.sm[k] = int(tokens[j])
\ No newline at end of file
+                self.sm[k] = int(tokens[j])
+        f.close()
+        self.build_dense()
+        if cache: self.save_cache(filename)
+
+    def build_dense(self):
+        ## matrix[index[ord(c1)], index[ord(c2)]] == sm[c1+c2]; '-' maps to the extra gap index
+        n = len(self.alphabet)
+        self.matrix = np.zeros((n, n), dtype=np.int64)
+        for i, c1 in enumerate(self.alphabet):
+            for j, c2 in enumerate(self.alphabet):
+                self.matrix[i, j] = self.sm[c1+c2]
+        self.index = np.full(256, -1, dtype=np.int64)
+        for k, c in enumerate(self.alphabet):
+            self.index[ord(c)] = k
+        self.index[ord("-")] = n
+        self.gap_tables = {}
+
+    def with_gap(self, g):
+        ## (n+1) x (n+1) table whose last row and column (the gap index) score g
+        if g not in self.gap_tables:
+            n = len(self.alphabet)
+            table = np.full((n+1, n+1), g, dtype=np.int64)
+            table[:n, :n] = self.matrix
+            self.gap_tables[g] = table
+        return self.gap_tables[g]
+
+    def encode(self, seq):
+        if isinstance(seq, np.ndarray): codes = self.index[seq]
+        else: codes = self.index[np.frombuffer(str(seq).encode("ascii"), dtype=np.uint8)]
+        if (codes < 0).any():
+            bad = int(np.argmax(codes < 0))
+            raise KeyError(chr(seq[bad]) if isinstance(seq, np.ndarray) else str(seq)[bad])
+        return codes
+
+    def scores(self, codes1, codes2, g = None):
+        ## vector lookup of whole code arrays (broadcasting like numpy indexing)
+        table = self.matrix if g is None else self.with_gap(g)
+        return table[codes1, codes2]
+
+    def load_cache(self, filename):
+        cache_file = filename + ".npy"
+        if not os.path.exists(cache_file) or os.path.getmtime(cache_file) < os.path.getmtime(filename):
+            return False
+        data = np.load(cache_file)
+        self.alphabet = [chr(c) for c in data[0]]
+        self.sm = {}
+        for i, c1 in enumerate(self.alphabet):
+            for j, c2 in enumerate(self.alphabet):
+                self.sm[c1+c2] = int(data[i+1, j])
+        self.build_dense()
+        return True
+
+    def save_cache(self, filename):
+        ## first row holds the alphabet as character codes, then the matrix
+        data = np.vstack(([ord(c) for c in self.alphabet], self.matrix)).astype(np.int64)
+        tmp = filename + ".npy.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, data)
+        os.replace(tmp, filename + ".npy")
@@ -1,40 +1,84 @@
 from multiplealign.substmatrix import SubstMatrix
 from multiplealign.pairwisealignment import PairwiseAlignment
+import os
 import random
+import re
+import pickle
+import io
+import gzip
+import bz2
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 import crossover as cross
 import crossover_lab as cross_l
+import encoded_msa as enc
+from msa_scoring import ProfileScorer, FitnessCache
+from fastaindex import FastaIndex
 
 PROTEIN_TYPE = "PROTEIN"
 CROSSOVER = 'cross'
 CROSSOVER_LAB = 'lab'
+REPR_STRING = 'str'
+REPR_ARRAY = 'array'
+SCORING_PAIRS = 'pairs'
+SCORING_PROFILE = 'profile'
+SELECTION_ROULETTE = 'roulette'
+SELECTION_SUS = 'sus'
+SELECTION_TOURNAMENT = 'tournament'
+MUTATION = 'mutation'
+CROSSOVER_OP = 'crossover'
 pa = None
+score_table = None
+scorer = None
+fitness_cache = None
+
+HTML_TAG = re.compile(r'<[^>]*>')
+READ_BUFFER = 1 << 20
+
+
+def open_fasta(filename):
+    #* Abre em modo texto; .gz/.bz2 detetados pelos primeiros bytes e descomprimidos em stream
+    with open(filename, 'rb') as f:
+        magic = f.read(3)
+    if magic[:2] == b'\x1f\x8b':
+        raw = io.BufferedReader(gzip.open(filename, 'rb'), buffer_size=READ_BUFFER)
+    elif magic == b'BZh':
+        raw = io.BufferedReader(bz2.open(filename, 'rb'), buffer_size=READ_BUFFER)
+    else:
+        raw = open(filename, 'rb', buffering=READ_BUFFER)
+    return io.TextIOWrapper(raw, encoding='utf-8', errors='replace')
+
 
-def read_fasta(filename):
-    sequences = []
-    previous_line = None
+def iter_fasta(filename):
+    #* Gerador de (cabeçalho, sequencia), um registo de cada vez: a memoria so guarda o registo atual.
+    #* Aceita cabeçalhos '>' e '&gt;' (exportações em HTML); as tags HTML sao removidas e as
+    #* linhas que so tinham tags (ex: '</div></pre>') sao ignoradas
+    header = None
     current_seq = []
-    
-    with open(filename, 'r') as f:
+    with open_fasta(filename) as f:
         for line in f:
-            line = line.strip()
-
-            #* Quando encontramos uma sequencia nova guardamos a antiga
-            if line.startswith('<') or line.startswith('&'):
-
-                #* Guardar sequência caso exista sequencia (pula só no 1 caso)
-                if previous_line is not None:
-                    seq_str = ''.join(current_seq)
-                    sequences.append(seq_str)
-                
-                #* Iniciar nova sequência
-                previous_line = line
+            line = HTML_TAG.sub('', line).strip()
+            if not line:
+                continue
+
+            if line.startswith('>') or line.startswith('&gt;'):
+                if header is not None:
+                    yield header, ''.join(current_seq)
+                header = line[1:] if line.startswith('>') else line[4:]
                 current_seq = []
-
-            #* linhas com a proteina guardamos a sequencia
             else:
-                current_seq.append(line) 
-    return sequences
+                current_seq.append(line)
+
+    if header is not None:
+        yield header, ''.join(current_seq)
+
+
+def read_fasta(filename, names=None):
+    #* Com names (nomes ou posições) so esses registos sao lidos, pelo indice .fai e mmap
+    if names is not None:
+        with FastaIndex(filename) as index:
+            return [index.fetch(name) for name in names]
+    return [seq for _, seq in iter_fasta(filename)]
 
 
 def initialize_population(sequences, population_size=100, max_offset=50):
@@ -48,6 +92,9 @@ def initialize_population(sequences, population_size=100, max_offset=50):
 
 
 def create_random_alignment(sequences, max_offset=50):
+    if isinstance(sequences[0], np.ndarray):
+        return create_random_alignment_array(sequences, max_offset)
+
     aligned_seqs = []
     
     #* colocar offsets de comprimento random no inicio das sequencias
@@ -71,7 +118,17 @@ def create_random_alignment(sequences, max_offset=50):
     return aligned_seqs
 
 
+def create_random_alignment_array(sequences, max_offset=50):
+    #* Mesmos sorteios que a versao com strings, por isso a mesma seed da o mesmo alinhamento
+    offsets = [random.randint(0, max_offset) for _ in sequences]
+    msa = enc.build_alignment(offsets, sequences)
+    return enc.remove_gap_only_columns(msa)
+
+
 def remove_gap_only_columns(aligned_seqs):
+    if isinstance(aligned_seqs, np.ndarray):
+        return enc.remove_gap_only_columns(aligned_seqs)
+
     if not aligned_seqs:
         return aligned_seqs
     
@@ -98,7 +155,36 @@ def remove_gap_only_columns(aligned_seqs):
     return result
 
 
+def remove_gap_only_columns_window(aligned_seqs, start, end):
+    #* So procura colunas de gaps em [start, end), devolve tambem o novo fim da janela
+    if isinstance(aligned_seqs, np.ndarray):
+        return enc.remove_gap_only_columns_window(aligned_seqs, start, end)
+
+    valid_columns = [col_idx for col_idx in range(start, end)
+                     if any(seq[col_idx] != '-' for seq in aligned_seqs)]
+    if len(valid_columns) == end - start:
+        return aligned_seqs, end
+
+    result = []
+    for seq in aligned_seqs:
+        new_seq = seq[:start] + ''.join(seq[col_idx] for col_idx in valid_columns) + seq[end:]
+        result.append(new_seq)
+
+    return result, start + len(valid_columns)
+
+
 def score_MSA(msa):
+    if fitness_cache is not None:
+        return fitness_cache.get_or_compute(msa, compute_MSA_score)
+    return compute_MSA_score(msa)
+
+
+def compute_MSA_score(msa):
+    if scorer is not None:
+        return scorer.score(msa)
+    if isinstance(msa, np.ndarray):
+        return score_MSA_array(msa)
+
     score = 0
     n = len(msa)
     
@@ -111,8 +197,36 @@ def score_MSA(msa):
     
     return score
 
+
+def score_MSA_array(msa):
+    global score_table
+    #* A tabela de scores so é construida uma vez por cada pa
+    if score_table is None or score_table[0] is not pa:
+        score_table = (pa, enc.pair_score_table(pa.sm, pa.g))
+    return enc.score_pairs(msa, score_table[1])
+
+
+def score_window(msa, start, end):
+    #* O score é uma soma por colunas, por isso podemos pontuar so uma fatia
+    #* Nao passa pela cache, as janelas nao sao individuos
+    if isinstance(msa, np.ndarray):
+        return compute_MSA_score(msa[:, start:end])
+    return compute_MSA_score([seq[start:end] for seq in msa])
+
+
+def score_mutation(parent, parent_score, offspring, window):
+    #* window = (seq_idx, inicio, fim no pai, fim no filho)
+    if window is None:
+        return parent_score
+    _, start, old_end, new_end = window
+    return parent_score - score_window(parent, start, old_end) + score_window(offspring, start, new_end)
+
+
 def print_indv(indv):
-    if isinstance(indv, list):
+    if isinstance(indv, np.ndarray):
+        for seq in enc.decode_alignment(indv):
+            print(seq)
+    elif isinstance(indv, list):
         for seq in indv:
             print(seq)
     else:
@@ -121,6 +235,11 @@ def print_indv(indv):
 
 
 def select_parents(scored_population, num_parents):
+    indices = select_parent_indices(scored_population, num_parents)
+    return [scored_population[i][0] for i in indices]
+
+
+def select_parent_indices(scored_population, num_parents):
     # Converter scores negativos para positivos (adicionar offset se necessário)
     scores = [score for _, score in scored_population]
     min_score = min(scores)
@@ -138,72 +257,198 @@ def select_parents(scored_population, num_parents):
     
     # Selecionar pais
     indices = np.random.choice(len(scored_population), size=num_parents, p=probabilities, replace=True)
-    selected_parents = [scored_population[i][0] for i in indices]
     
-    return selected_parents
+    return indices
+
+
+def draw_parent_indices(scored_population, num_parents, selection=SELECTION_ROULETTE, tournament_size=3):
+    #* Todos os pais da geração numa so chamada, a estrutura de amostragem é construida uma vez
+    scores = np.array([score for _, score in scored_population], dtype=np.float64)
+    n = len(scores)
+    if num_parents == 0:
+        #* Elitismo encheu a geração toda: nao ha pais a sortear
+        return np.zeros(0, dtype=np.int64)
+
+    if selection == SELECTION_TOURNAMENT:
+        #* k-torneio: o melhor de k individuos sorteados com reposição
+        candidates = np.random.randint(0, n, size=(num_parents, tournament_size))
+        winners = scores[candidates].argmax(axis=1)
+        return candidates[np.arange(num_parents), winners]
+
+    # Mesmo ajuste de scores negativos que o select_parents
+    min_score = scores.min()
+    if min_score < 0:
+        scores = scores - min_score + 1
+    total = scores.sum()
+    if total <= 0:
+        #* Roleta sem fitness (todos os scores a 0): falhar como na roleta original, nao devolver sempre o indice 0
+        raise ValueError("Cannot select parents: all fitness scores are zero")
+    probabilities = scores / total
+
+    if selection == SELECTION_SUS:
+        #* Stochastic universal sampling: num_parents ponteiros igualmente espaçados sobre a roleta
+        cumulative = np.cumsum(probabilities)
+        pointers = np.random.uniform(0, 1.0 / num_parents) + np.arange(num_parents) / num_parents
+        indices = np.minimum(np.searchsorted(cumulative, pointers, side='right'), n - 1)
+        #* Baralhar para os pares de pais nao serem sempre vizinhos no ranking
+        return np.random.permutation(indices)
+
+    return np.random.choice(n, size=num_parents, p=probabilities, replace=True)
+
+
+def plan_offspring(current_population, num_offspring, mutation_prob=0.3, selection=None, tournament_size=3):
+    #* Decide o operador de cada filho e os respetivos pais: [(MUTATION|CROSSOVER_OP, indices), ...]
+    if selection is None:
+        #* Seleção original: uma roleta por cada filho
+        plan = []
+        for _ in range(num_offspring):
+            if random.random() < mutation_prob:
+                plan.append((MUTATION, select_parent_indices(current_population, 1)))
+            else:
+                plan.append((CROSSOVER_OP, select_parent_indices(current_population, 2)))
+        return plan
+
+    kinds = [MUTATION if random.random() < mutation_prob else CROSSOVER_OP for _ in range(num_offspring)]
+    num_parents = sum(1 if kind == MUTATION else 2 for kind in kinds)
+    indices = draw_parent_indices(current_population, num_parents, selection, tournament_size)
 
+    plan = []
+    pos = 0
+    for kind in kinds:
+        count = 1 if kind == MUTATION else 2
+        plan.append((kind, indices[pos:pos + count]))
+        pos += count
+    return plan
 
-def create_next_generation(current_population, population_size, elite_size=0.1, mutation_prob=0.3, crossover=CROSSOVER_LAB): 
+
+def create_next_generation(current_population, population_size, elite_size=0.1, mutation_prob=0.3, crossover=CROSSOVER_LAB,
+                           delta_scoring=False, selection=None, tournament_size=3): 
     #* ELITISMO: Manter os melhores
     num_elite = max(1, int(population_size * elite_size))
     next_gen = current_population[:num_elite]  # Já está ordenado
+
+    if selection is not None:
+        #* Pais de toda a geração sorteados de uma vez
+        for kind, idx in plan_offspring(current_population, population_size - num_elite, mutation_prob,
+                                        selection, tournament_size):
+            if kind == MUTATION:
+                parent, parent_score = current_population[idx[0]]
+                next_gen.append(make_mutation_offspring(parent, parent_score, delta_scoring))
+            else:
+                father, mother = current_population[idx[0]][0], current_population[idx[1]][0]
+                next_gen.append(make_crossover_offspring(father, mother, crossover))
+        return next_gen
     
     while len(next_gen) < population_size:
         # Escolhe entre mutação e crossover
         if random.random() < mutation_prob:
             # MUTAÇÃO
-            parent = select_parents(current_population, 1)[0]
-            offspring = mutate_split_gap_block(parent)
-            offspring_score = score_MSA(offspring)
+            parent, parent_score = current_population[select_parent_indices(current_population, 1)[0]]
+            offspring, offspring_score = make_mutation_offspring(parent, parent_score, delta_scoring)
         else:
             # CROSSOVER
             parents = select_parents(current_population, 2)
-            father, mother = parents[0], parents[1]
-            
-            if crossover == CROSSOVER_LAB:
-                # crossover_lab: passar índice de coluna baseado em resíduos
-                # Escolher quantos resíduos queremos na parte esquerda
-                max_residues = min(count_residues(father[0]), count_residues(mother[0]))
-                if max_residues > 1:
-                    num_residues = random.randint(1, max_residues - 1)
-                    # Encontrar em que coluna ficam esses resíduos no father
-                    count = 0
-                    split_point = 1
-                    for i, c in enumerate(father[0]):
-                        if c != '-':
-                            count += 1
-                            if count == num_residues:
-                                split_point = i + 1
-                                break
-                else:
-                    split_point = 1
-                # podiamos so ter feito assim... split_point = cross_l.index_at_residue(father[0], num_residues)    
-                offspring1, offspring2 = cross_l.generate_offspring(father, mother, split_point)
-            else:
-                # crossover espera número de resíduos (índice de sequência)
-                max_residues = min(count_residues(father[0]), count_residues(mother[0]))
-                if max_residues > 1:
-                    split_point = random.randint(1, max_residues - 1)
-                else:
-                    split_point = 1
-                offspring1, offspring2 = cross.generate_offspring(father, mother, split_point)
-            
-            # Escolher o melhor dos dois
-            score1 = score_MSA(offspring1)
-            score2 = score_MSA(offspring2)
-            offspring = offspring1 if score1 > score2 else offspring2
-            offspring_score = score1 if score1 > score2 else score2
+            offspring, offspring_score = make_crossover_offspring(parents[0], parents[1], crossover)
         
         next_gen.append((offspring, offspring_score))
     
     return next_gen
 
 
+def make_mutation_offspring(parent, parent_score, delta_scoring=False):
+    if delta_scoring:
+        #* Atualizar o score do pai so com a janela que a mutação alterou
+        offspring, window = mutate_split_gap_block(parent, return_window=True)
+        return offspring, score_mutation(parent, parent_score, offspring, window)
+
+    offspring = mutate_split_gap_block(parent)
+    return offspring, score_MSA(offspring)
+
+
+def make_crossover_offspring(father, mother, crossover=CROSSOVER_LAB):
+    if crossover == CROSSOVER_LAB:
+        # crossover_lab: passar índice de coluna baseado em resíduos
+        # Escolher quantos resíduos queremos na parte esquerda
+        max_residues = min(count_residues(father[0]), count_residues(mother[0]))
+        if max_residues > 1:
+            num_residues = random.randint(1, max_residues - 1)
+            # Encontrar em que coluna ficam esses resíduos no father
+            split_point = cross_l.index_at_residue(father[0], num_residues)
+        else:
+            split_point = 1
+        offspring1, offspring2 = cross_l.generate_offspring(father, mother, split_point)
+    else:
+        # crossover espera número de resíduos (índice de sequência)
+        max_residues = min(count_residues(father[0]), count_residues(mother[0]))
+        if max_residues > 1:
+            split_point = random.randint(1, max_residues - 1)
+        else:
+            split_point = 1
+        offspring1, offspring2 = cross.generate_offspring(father, mother, split_point)
+    
+    # Escolher o melhor dos dois
+    score1 = score_MSA(offspring1)
+    score2 = score_MSA(offspring2)
+    if score1 > score2:
+        return offspring1, score1
+    return offspring2, score2
+
+
+def init_worker(submat, g, scoring=SCORING_PAIRS):
+    #* Cada processo do pool cria o seu proprio pa (e scorer) uma unica vez no arranque
+    global pa, scorer, score_table, fitness_cache
+    if isinstance(submat, str):
+        sm = SubstMatrix()
+        sm.read_submat_file(submat, cache=True)
+    else:
+        sm = submat
+    pa = PairwiseAlignment(sm, g)
+    scorer = ProfileScorer(sm, g) if scoring == SCORING_PROFILE else None
+    score_table = None
+    fitness_cache = None
+
+
+def offspring_task(task):
+    #* Corre num worker: a seed vem do processo principal para o resultado nao depender do pool
+    kind, seed, parents, crossover, delta_scoring = task
+    random.seed(seed)
+    if kind == MUTATION:
+        parent, parent_score = parents[0]
+        return make_mutation_offspring(parent, parent_score, delta_scoring)
+    return make_crossover_offspring(parents[0][0], parents[1][0], crossover)
+
+
+def create_next_generation_parallel(executor, current_population, population_size, elite_size=0.1, mutation_prob=0.3,
+                                    crossover=CROSSOVER_LAB, delta_scoring=False, workers=1, selection=None,
+                                    tournament_size=3):
+    #* ELITISMO: Manter os melhores
+    num_elite = max(1, int(population_size * elite_size))
+    next_gen = current_population[:num_elite]
+
+    #* A seleção é feita aqui, os workers so criam e avaliam os filhos
+    plan = plan_offspring(current_population, population_size - num_elite, mutation_prob, selection, tournament_size)
+    tasks = []
+    for kind, idx in plan:
+        seed = random.getrandbits(32)
+        tasks.append((kind, seed, [current_population[i] for i in idx], crossover, delta_scoring))
+
+    chunksize = max(1, len(tasks) // (4 * workers))
+    next_gen.extend(executor.map(offspring_task, tasks, chunksize=chunksize))
+
+    return next_gen
+
+
 def count_residues(seq):
+    if isinstance(seq, np.ndarray):
+        return enc.count_residues(seq)
     return sum(1 for c in seq if c != '-')
 
 
-def mutate_split_gap_block(alignment):
+def mutate_split_gap_block(alignment, return_window=False):
+    #* Com return_window=True devolve tambem (seq_idx, inicio, fim no pai, fim no filho) da zona alterada
+    if isinstance(alignment, np.ndarray):
+        return mutate_split_gap_block_array(alignment, return_window)
+
     import copy
     mutated = copy.deepcopy(alignment)
     
@@ -239,7 +484,7 @@ def mutate_split_gap_block(alignment):
 
     #* Se nenhuma sequência tiver blocos de gaps, devolvemos mutated sendo igual ao pai
     if checked == len(mutated):
-        return mutated
+        return (mutated, None) if return_window else mutated
     
     #* escolher bloco que vamos partir
     block_start, block_end = random.choice(gap_blocks)
@@ -270,26 +515,84 @@ def mutate_split_gap_block(alignment):
     
     mutated[seq_idx] = ''.join(new_seq)
     
-    # Remover colunas só de gaps
-    mutated = remove_gap_only_columns(mutated)
+    # Remover colunas só de gaps (só podem aparecer dentro da janela alterada)
+    mutated, new_end = remove_gap_only_columns_window(mutated, insert_left_pos, insert_right_pos)
     
+    if return_window:
+        return mutated, (seq_idx, insert_left_pos, insert_right_pos, new_end)
     return mutated
 
 
-def run_genetic_algorithm(sequences, population_size=10, max_generations=100, 
-                         no_improvement_limit=20, max_offset=10, crossover=CROSSOVER_LAB):
+def mutate_split_gap_block_array(alignment, return_window=False):
+    #* Mesma operacao (e mesmos sorteios) que mutate_split_gap_block, mas sobre a matriz uint8
+    n_seqs = alignment.shape[0]
+    seq_idx = random.randint(0, n_seqs - 1)
+    checked = 0
 
-    print("="*70)
-    print("GENETIC ALGORITHM - MULTIPLE SEQUENCE ALIGNMENT")
-    print("="*70)
-    print(f"Configuration:")
-    print(f"  Population size: {population_size}")
-    print(f"  Max generations: {max_generations}")
-    print(f"  No improvement limit: {no_improvement_limit}")
-    print(f"  Max initial offset: {max_offset}")
-    print(f"  Crossover method: {'CROSSOVER_LAB' if crossover == CROSSOVER_LAB else 'CROSSOVER'}")
-    print(f"  Sequences: {len(sequences)} (lengths: {[len(s) for s in sequences]})")
-    print()
+    while checked < n_seqs:
+        gap_blocks = enc.gap_blocks(alignment[seq_idx])
+        if gap_blocks:
+            break
+        seq_idx = (seq_idx + 1) % n_seqs
+        checked += 1
+
+    if checked == n_seqs:
+        return (alignment.copy(), None) if return_window else alignment.copy()
+
+    seq = alignment[seq_idx]
+    block_start, block_end = random.choice(gap_blocks)
+
+    block_length = block_end - block_start
+    left_length = random.randint(1, block_length - 1)
+    right_length = block_length - left_length
+
+    left_shift = random.choice([-3, -2, -1])
+    insert_left_pos = max(0, block_start + left_shift)
+
+    right_shift = random.choice([1, 2, 3])
+    insert_right_pos = min(len(seq), block_end + right_shift)
+
+    #* So a janela [insert_left_pos, insert_right_pos) muda, o resto da linha fica igual
+    mutated = alignment.copy()
+    left_gap = insert_left_pos + left_length
+    moved_left = block_start - insert_left_pos
+    moved_right = insert_right_pos - block_end
+    row = mutated[seq_idx]
+    row[insert_left_pos:left_gap] = enc.GAP
+    row[left_gap:left_gap + moved_left] = seq[insert_left_pos:block_start]
+    row[left_gap + moved_left:left_gap + moved_left + moved_right] = seq[block_end:insert_right_pos]
+    row[insert_right_pos - right_length:insert_right_pos] = enc.GAP
+
+    mutated, new_end = enc.remove_gap_only_columns_window(mutated, insert_left_pos, insert_right_pos)
+
+    if return_window:
+        return mutated, (seq_idx, insert_left_pos, insert_right_pos, new_end)
+    return mutated
+
+
+def run_genetic_algorithm(sequences, population_size=10, max_generations=100, 
+                         no_improvement_limit=20, max_offset=10, crossover=CROSSOVER_LAB,
+                         representation=REPR_STRING, scoring=SCORING_PAIRS, delta_scoring=False,
+                         cache_size=0, workers=1, selection=None, tournament_size=3,
+                         checkpoint_file=None, checkpoint_interval=10):
+    if cache_size > 0 and workers > 1:
+        #* Os workers criam e avaliam os filhos: a cache do processo principal so veria a população inicial
+        raise ValueError("The fitness cache (cache_size > 0) cannot be used with workers > 1")
+    config = dict(population_size=population_size, max_generations=max_generations,
+                  no_improvement_limit=no_improvement_limit, max_offset=max_offset, crossover=crossover,
+                  representation=representation, scoring=scoring, delta_scoring=delta_scoring,
+                  cache_size=cache_size, workers=workers, selection=selection, tournament_size=tournament_size,
+                  checkpoint_file=checkpoint_file, checkpoint_interval=checkpoint_interval)
+    print_configuration(config, sequences)
+
+    #* Na representacao em array codificamos as sequencias uma unica vez
+    #* (as views uint8 de um SeqStore passam sem copia; na representacao string sao descodificadas)
+    if representation == REPR_ARRAY:
+        sequences = enc.encode_sequences(sequences, pa.sm.alphabet)
+    elif isinstance(sequences[0], np.ndarray):
+        sequences = [enc.decode_row(seq) for seq in sequences]
+
+    setup_scoring(config)
 
     population = initialize_population(sequences, population_size, max_offset)
     
@@ -300,20 +603,134 @@ def run_genetic_algorithm(sequences, population_size=10, max_generations=100,
         reverse=True
     )
     
-    best_ever = scored_population[0]
-    best_score_history = [best_ever[1]]
-    generations_without_improvement = 0
+    state = {
+        'generation': 0,
+        'scored_population': scored_population,
+        'best_ever': scored_population[0],
+        'history': [scored_population[0][1]],
+        'generations_without_improvement': 0,
+    }
     
-    print(f"Generation 0: Best score = {best_ever[1]}")
+    print(f"Generation 0: Best score = {state['best_ever'][1]}")
     print()
-    
+
+    return evolve_population(sequences, config, state)
+
+
+def resume_genetic_algorithm(checkpoint_file, workers=None):
+    #* Continua a partir do ultimo checkpoint; com o mesmo estado dos geradores aleatorios
+    #* o resultado é igual ao da execução sem interrupção. So o tamanho do pool pode mudar:
+    #* a geração serie (workers == 1) e a paralela usam sequencias aleatorias diferentes
+    global pa
+    checkpoint = load_checkpoint(checkpoint_file)
+    config = checkpoint['config']
+    config['checkpoint_file'] = checkpoint_file
+    if workers is not None:
+        if (workers > 1) != (config['workers'] > 1):
+            raise ValueError(f"Cannot resume a run with workers={config['workers']} using workers={workers}: "
+                             "switching between serial and parallel generation changes the results")
+        config['workers'] = workers
+    pa = PairwiseAlignment(checkpoint['submat'], checkpoint['gap'])
+    random.setstate(checkpoint['random_state'])
+    np.random.set_state(checkpoint['np_random_state'])
+
+    print_configuration(config, checkpoint['sequences'])
+    setup_scoring(config)
+    print(f"Resuming from generation {checkpoint['state']['generation']}: "
+          f"Best score = {checkpoint['state']['best_ever'][1]}")
+    print()
+
+    return evolve_population(checkpoint['sequences'], config, checkpoint['state'])
+
+
+def print_configuration(config, sequences):
+    print("="*70)
+    print("GENETIC ALGORITHM - MULTIPLE SEQUENCE ALIGNMENT")
+    print("="*70)
+    print(f"Configuration:")
+    print(f"  Population size: {config['population_size']}")
+    print(f"  Max generations: {config['max_generations']}")
+    print(f"  No improvement limit: {config['no_improvement_limit']}")
+    print(f"  Max initial offset: {config['max_offset']}")
+    print(f"  Crossover method: {'CROSSOVER_LAB' if config['crossover'] == CROSSOVER_LAB else 'CROSSOVER'}")
+    print(f"  Representation: {'ARRAY' if config['representation'] == REPR_ARRAY else 'STRING'}")
+    print(f"  Scoring: {'PROFILE' if config['scoring'] == SCORING_PROFILE else 'PAIRS'}")
+    print(f"  Delta scoring for mutations: {config['delta_scoring']}")
+    print(f"  Fitness cache size: {config['cache_size']}")
+    print(f"  Worker processes: {config['workers']}")
+    print(f"  Selection: {config['selection'] or 'per-offspring roulette'}")
+    if config['checkpoint_file'] is not None:
+        print(f"  Checkpoint: {config['checkpoint_file']} every {config['checkpoint_interval']} generations")
+    print(f"  Sequences: {len(sequences)} (lengths: {[len(s) for s in sequences]})")
+    print()
+
+
+def setup_scoring(config):
+    global scorer, fitness_cache
+    #* O scorer por perfil de colunas substitui o ciclo sobre todos os pares
+    scorer = ProfileScorer(pa.sm, pa.g) if config['scoring'] == SCORING_PROFILE else None
+    fitness_cache = FitnessCache(config['cache_size']) if config['cache_size'] > 0 else None
+
+
+def save_checkpoint(checkpoint_file, sequences, config, state):
+    #* Estado completo do GA em pickle binario; escrito num ficheiro temporario e depois
+    #* os.replace, um checkpoint interrompido a meio nunca substitui o anterior
+    checkpoint = {
+        'config': config,
+        'sequences': sequences,
+        'submat': pa.sm,
+        'gap': pa.g,
+        'state': state,
+        'random_state': random.getstate(),
+        'np_random_state': np.random.get_state(),
+    }
+    tmp = checkpoint_file + '.tmp'
+    with open(tmp, 'wb') as f:
+        pickle.dump(checkpoint, f, protocol=pickle.HIGHEST_PROTOCOL)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, checkpoint_file)
+
+
+def load_checkpoint(checkpoint_file):
+    with open(checkpoint_file, 'rb') as f:
+        return pickle.load(f)
+
+
+def evolve_population(sequences, config, state):
+    population_size = config['population_size']
+    max_generations = config['max_generations']
+    no_improvement_limit = config['no_improvement_limit']
+    workers = config['workers']
+    scored_population = state['scored_population']
+    best_ever = state['best_ever']
+    best_score_history = state['history']
+    generations_without_improvement = state['generations_without_improvement']
+    generation = state['generation']
+
+    #* Pool de processos para gerar e avaliar os filhos em paralelo
+    executor = None
+    if workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                       initargs=(pa.sm, pa.g, config['scoring']))
+
     #* Loop gerações
-    for generation in range(1, max_generations + 1):
+    for generation in range(state['generation'] + 1, max_generations + 1):
         print(f"\n{'='*70}")
         print(f"GENERATION {generation}/{max_generations}")
         print(f"{'='*70}")
         
-        scored_population = create_next_generation(scored_population, population_size, elite_size=0.1, mutation_prob=0.3, crossover=crossover)
+        if executor is not None:
+            scored_population = create_next_generation_parallel(executor, scored_population, population_size, elite_size=0.1,
+                                                                mutation_prob=0.3, crossover=config['crossover'],
+                                                                delta_scoring=config['delta_scoring'], workers=workers,
+                                                                selection=config['selection'],
+                                                                tournament_size=config['tournament_size'])
+        else:
+            scored_population = create_next_generation(scored_population, population_size, elite_size=0.1, mutation_prob=0.3,
+                                                       crossover=config['crossover'], delta_scoring=config['delta_scoring'],
+                                                       selection=config['selection'],
+                                                       tournament_size=config['tournament_size'])
         
         #* Sort por score
         scored_population.sort(key=lambda x: x[1], reverse=True)
@@ -343,23 +760,43 @@ def run_genetic_algorithm(sequences, population_size=10, max_generations=100,
             print()
             print(f"Stopping: No improvement for {no_improvement_limit} consecutive generations")
             break
+
+        #* Checkpoint periodico (depois da geração completa, com o estado dos geradores neste ponto)
+        if config['checkpoint_file'] is not None and generation % config['checkpoint_interval'] == 0:
+            save_checkpoint(config['checkpoint_file'], sequences, config, {
+                'generation': generation,
+                'scored_population': scored_population,
+                'best_ever': best_ever,
+                'history': best_score_history,
+                'generations_without_improvement': generations_without_improvement,
+            })
+
+    if executor is not None:
+        executor.shutdown()
     
     print()
     print("FINAL RESULT")
     print(f"Best score found: {best_ever[1]}")
     print(f"Generations executed: {generation}")
+    if fitness_cache is not None:
+        print(f"Fitness cache: {fitness_cache.hits} hits, {fitness_cache.misses} misses "
+              f"(hit rate {fitness_cache.hit_rate():.1%})")
     print()
     print("Best alignment:")
     print_indv(best_ever[0])
+
+    best_alignment = best_ever[0]
+    if isinstance(best_alignment, np.ndarray):
+        best_alignment = enc.decode_alignment(best_alignment)
     
-    return best_ever[0], best_ever[1], best_score_history
+    return best_alignment, best_ever[1], best_score_history
 
 
 if __name__ == "__main__":
 
     sequences = read_fasta('./cytochromes.fa')
     submat = SubstMatrix()
-    submat.read_submat_file("blosum62.mat") 
+    submat.read_submat_file("blosum62.mat", cache=True)
     pa = PairwiseAlignment(submat, -8) 
     
     print("Original sequences:")
@@ -0,0 +1,88 @@
+import os
+import numpy as np
+from fastaindex import record_name
+
+#* Formato (little-endian):
+#*   magic (8 bytes) | n, inicio dos residuos, inicio dos offsets, inicio dos nomes, bytes dos nomes (int64)
+#*   residuos de todas as sequencias seguidos (uint8, codigos ASCII como no encoded_msa)
+#*   offsets (n+1 int64): a sequencia k é residues[offsets[k]:offsets[k+1]]
+#*   nomes separados por '\n' (utf-8)
+#* Os residuos sao escritos em stream, os offsets e nomes só no fim, e o cabeçalho é preenchido no fim
+MAGIC = b'SEQSTOR1'
+HEADER = np.dtype([('n', '<i8'), ('residues', '<i8'), ('offsets', '<i8'), ('names', '<i8'), ('names_len', '<i8')])
+HEADER_SIZE = len(MAGIC) + HEADER.itemsize
+
+
+def write_store(filename, records):
+    #* records: iteravel de (cabeçalho, sequencia), por exemplo project1.iter_fasta(fasta); cada registo
+    #* fica com o nome do FastaIndex (primeira palavra do cabeçalho)
+    offsets = [0]
+    names = []
+    tmp = filename + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(MAGIC + bytes(HEADER.itemsize))
+        for name, seq in records:
+            data = seq.encode('ascii') if isinstance(seq, str) else np.asarray(seq, dtype=np.uint8).tobytes()
+            f.write(data)
+            offsets.append(offsets[-1] + len(data))
+            names.append(record_name(name))
+        #* offsets alinhados a 8 bytes para o memmap
+        pad = (-f.tell()) % 8
+        f.write(bytes(pad))
+        offsets_start = f.tell()
+        f.write(np.asarray(offsets, dtype='<i8').tobytes())
+        names_start = f.tell()
+        names_blob = '\n'.join(names).encode('utf-8')
+        f.write(names_blob)
+        header = np.array([(len(names), HEADER_SIZE, offsets_start, names_start, len(names_blob))], dtype=HEADER)
+        f.seek(len(MAGIC))
+        f.write(header.tobytes())
+    os.replace(tmp, filename)
+
+
+def convert_fasta(fasta_file, filename):
+    from project1 import iter_fasta
+    write_store(filename, iter_fasta(fasta_file))
+
+
+class SeqStore:
+    #* Conjunto de sequencias mapeado em memoria: cada sequencia é uma view uint8 (sem copia)
+
+    def __init__(self, filename):
+        self.filename = filename
+        with open(filename, 'rb') as f:
+            head = f.read(HEADER_SIZE)
+        if len(head) < HEADER_SIZE or head[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{filename}: not a sequence store")
+        h = np.frombuffer(head[len(MAGIC):], dtype=HEADER)[0]
+        self.data = np.memmap(filename, dtype=np.uint8, mode='r')
+        self.offsets = self.data[h['offsets']:h['offsets'] + 8 * (h['n'] + 1)].view('<i8')
+        self.residues = self.data[h['residues']:h['residues'] + self.offsets[-1]]
+        names = self.data[h['names']:h['names'] + h['names_len']].tobytes().decode('utf-8')
+        self.names = names.split('\n') if h['n'] > 0 else []
+        self.index = {name: k for k, name in enumerate(self.names)}
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, key):
+        #* Por posição ou por nome
+        k = self.index[key] if isinstance(key, str) else key
+        if not -len(self) <= k < len(self):
+            raise IndexError(k)
+        k %= len(self)
+        return self.residues[self.offsets[k]:self.offsets[k + 1]]
+
+    def sequences(self):
+        #* Views uint8 prontas para a representacao em array do GA
+        return [self[k] for k in range(len(self))]
+
+    def strings(self):
+        return [self[k].tobytes().decode('ascii') for k in range(len(self))]
+
+    def as_myseqs(self, seq_type="PROTEIN", seq_class=None):
+        #* Para o multiplealign/upgma: copias descodificadas, nao views (MySeq e o traceback do
+        #* PairwiseAlignment trabalham com str)
+        if seq_class is None:
+            from multiplealign.myseq import MySeq as seq_class
+        return [seq_class(s, seq_type) for s in self.strings()]
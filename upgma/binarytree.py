@@ -1,14 +1,29 @@
+import numpy as np
+
 class BinaryTree:
     
-    def __init__(self, val, dist=0, left = None, right = None):
+    def __init__(self, val, dist=0, left = None, right = None, left_len = None, right_len = None):
+        ## left_len / right_len: branch lengths to the children (neighbor joining trees)
         self.value = val
         self.distance = dist
         self.left = left
         self.right = right
+        self.left_len = left_len
+        self.right_len = right_len
         
     def print_tree(self):
-        self.print_tree_rec(0, "Root")
-        
+        ## iterative, deep unbalanced trees do not reach the recursion limit
+        stack = [(self, 0, "Root")]
+        while stack:
+            node, level, side = stack.pop()
+            tabs = "\t" * level
+            if node.value >= 0:
+                print(tabs, side, " - value:", node.value)
+            else:
+                print(tabs, side, "- Dist.: ", node.distance)
+                if (node.right != None): stack.append((node.right, level+1, "Right"))
+                if (node.left != None): stack.append((node.left, level+1, "Left"))
+
     def print_tree_rec(self, level, side):
         tabs = ""
         for i in range(level): tabs += "\t"
@@ -23,16 +38,97 @@ class BinaryTree:
   
     def get_cluster(self):
         res = []
-        if self.value >= 0:
-            res.append(self.value)
-        else:
-            if (self.left != None):
-                res.extend(self.left.get_cluster())
-            if (self.right != None):
-                res.extend(self.right.get_cluster())
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node.value >= 0:
+                res.append(node.value)
+            else:
+                if (node.right != None): stack.append(node.right)
+                if (node.left != None): stack.append(node.left)
         return res
 
-                
+
+class ArrayTree:
+    ## compact tree: leaves are nodes 0..n-1 (value = node), internal nodes are added
+    ## after their children, the last one is the root. Parallel arrays hold the children
+    ## (-1 for leaves), the height (distance of BinaryTree) and the number of leaves.
+
+    def __init__(self, num_leaves):
+        self.num_leaves = num_leaves
+        total = max(1, 2 * num_leaves - 1)
+        self.left = np.full(total, -1, dtype=np.int64)
+        self.right = np.full(total, -1, dtype=np.int64)
+        self.height = np.zeros(total)
+        self.size = np.zeros(total, dtype=np.int64)
+        self.size[:num_leaves] = 1
+        self.num_nodes = num_leaves
+
+    def join(self, left, right, height):
+        k = self.num_nodes
+        self.left[k] = left
+        self.right[k] = right
+        self.height[k] = height
+        self.size[k] = self.size[left] + self.size[right]
+        self.num_nodes += 1
+        return k
+
+    def root(self):
+        return self.num_nodes - 1
+
+    def cluster_size(self, node = None):
+        return int(self.size[self.root() if node is None else node])
+
+    def leaves(self, node = None):
+        ## leaves from left to right, like BinaryTree.get_cluster
+        stack = [self.root() if node is None else node]
+        while stack:
+            k = stack.pop()
+            if k < self.num_leaves:
+                yield k
+            else:
+                stack.append(int(self.right[k]))
+                stack.append(int(self.left[k]))
+
+    def get_cluster(self, node = None):
+        return list(self.leaves(node))
+
+    def to_binarytree(self):
+        nodes = [BinaryTree(i) for i in range(self.num_leaves)]
+        for k in range(self.num_leaves, self.num_nodes):
+            nodes.append(BinaryTree(-1, float(self.height[k]), nodes[self.left[k]], nodes[self.right[k]]))
+        return nodes[-1] if nodes else None
+
+    def print_tree(self):
+        stack = [(self.root(), 0, "Root")]
+        while stack:
+            k, level, side = stack.pop()
+            tabs = "\t" * level
+            if k < self.num_leaves:
+                print(tabs, side, " - value:", k)
+            else:
+                print(tabs, side, "- Dist.: ", float(self.height[k]))
+                stack.append((int(self.right[k]), level+1, "Right"))
+                stack.append((int(self.left[k]), level+1, "Left"))
+
+    def write_newick(self, f, names = None):
+        ## streams the tree to the open file f; branch lengths are height differences
+        stack = [(self.root(), None)]
+        while stack:
+            k, parent = stack.pop()
+            if isinstance(k, str):
+                f.write(k)
+                continue
+            length = "" if parent is None else ":" + repr(float(self.height[parent] - self.height[k]))
+            if k < self.num_leaves:
+                f.write((str(k) if names is None else names[k]) + length)
+            else:
+                stack.append((")" + length, None))
+                stack.append((int(self.right[k]), k))
+                stack.append((",", None))
+                stack.append((int(self.left[k]), k))
+                f.write("(")
+        f.write(";\n")
 
 def test():
     a = BinaryTree(1)
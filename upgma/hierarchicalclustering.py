@@ -1,12 +1,91 @@
-from binarytree import BinaryTree
+import numpy as np
+from binarytree import BinaryTree, ArrayTree
 from nummatrix import NumMatrix
 
 class HierarchicalClustering:
 
     def __init__(self, matdists):
+        ## NumMatrix, square array or condensed (upper triangle, row by row) distances
         self.matdists = matdists
 
+    def dist_array(self):
+        m = self.matdists
+        if isinstance(m, NumMatrix):
+            n = m.num_rows()
+            D = np.zeros((n, n))
+            for i in range(n):
+                for j in range(i):
+                    D[i, j] = D[j, i] = m.get_value(i, j)
+            return D
+        m = np.asarray(m, dtype=np.float64)
+        if m.ndim == 2:
+            ## only the lower triangle is used, like NumMatrix.get_value
+            low = np.tril(m, -1)
+            return low + low.T
+        n = int(round((1 + np.sqrt(1 + 8 * len(m))) / 2))
+        D = np.zeros((n, n))
+        D[np.triu_indices(n, 1)] = m
+        return D + D.T
+
     def execute_clustering(self):
+        tree = self.execute_clustering_array()
+        return None if tree is None else tree.to_binarytree()
+
+    def execute_clustering_array(self):
+        ## ArrayTree with the same tree as execute_clustering_python, in O(N^2) time plus the
+        ## rescans below. Clusters keep a slot in D and an order key (their position order in
+        ## the list version): a row holds the distances to clusters of smaller order, the first
+        ## minimum of a row is cached. Rows only lose entries, so when a row's cached cluster is
+        ## merged away its minimum is kept as a lower bound and the row is only rescanned if it
+        ## comes out on top.
+        D = self.dist_array()
+        n = D.shape[0]
+        if n < 2: return None
+        tree = ArrayTree(n)
+        nodes = np.arange(n)
+        order = np.arange(n)
+        sizes = np.ones(n, dtype=np.int64)
+        active = np.ones(n, dtype=bool)
+        row_min = np.full(n, np.inf)
+        row_arg = np.full(n, -1)
+        stale = np.zeros(n, dtype=bool)
+
+        def update_row(s):
+            below = active & (order < order[s])
+            if not below.any():
+                row_min[s] = np.inf; row_arg[s] = -1
+                return
+            vals = np.where(below, D[s], np.inf)
+            m = vals.min()
+            ties = np.flatnonzero(vals == m)
+            row_min[s] = m
+            row_arg[s] = ties[np.argmin(order[ties])]
+            stale[s] = False
+
+        for s in range(n): update_row(s)
+        next_order = n
+        for k in range(n, 1, -1):
+            while True:
+                m = row_min[active].min()
+                rows = np.flatnonzero(active & (row_min == m))
+                a = rows[np.argmin(order[rows])]
+                if not stale[a]: break
+                update_row(a)
+            b = row_arg[a]
+            node = tree.join(nodes[a], nodes[b], D[a, b]/2.0)
+            if k == 2: return tree
+            si, sj = sizes[a], sizes[b]
+            new = (si * D[a] + sj * D[b]) / (si + sj)
+            active[a] = False
+            D[b] = new; D[:, b] = new; D[b, b] = 0
+            nodes[b] = node
+            sizes[b] = si + sj
+            order[b] = next_order; next_order += 1
+            row_min[a] = np.inf
+            stale[active & ((row_arg == a) | (row_arg == b))] = True
+            update_row(b)
+
+    def execute_clustering_python(self):
         ## initialization of the tree leaves and matrix
         trees = []
         for i in range(self.matdists.num_rows()):
@@ -58,4 +137,23 @@ def test():
     m.print_mat()
     hc = HierarchicalClustering(m)
     arv = hc.execute_clustering()
-    arv.print_tree()
\ No newline at end of file
+    arv.print_tree()
+
+def tree_key(t):
+    ## nested tuples (value, distance, left, right) to compare two BinaryTrees
+    if t is None: return None
+    return (t.value, t.distance, tree_key(t.left), tree_key(t.right))
+
+def test_array(ntests = 50, seed = 0):
+    ## execute_clustering against execute_clustering_python on random matrices, with
+    ## small integer distances (many ties) and with float distances: the same tree
+    rng = np.random.default_rng(seed)
+    for t in range(ntests):
+        n = int(rng.integers(2, 25))
+        m = NumMatrix(n, n)
+        for i in range(n):
+            for j in range(i+1, n):
+                m.set_value(i, j, int(rng.integers(1, 6)) if t % 2 == 0 else float(rng.random()))
+        hc = HierarchicalClustering(m)
+        assert tree_key(hc.execute_clustering()) == tree_key(hc.execute_clustering_python()), m.mat
+    print(ntests, "random matrices: execute_clustering matches execute_clustering_python")
\ No newline at end of file
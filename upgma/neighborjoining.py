@@ -0,0 +1,113 @@
+import numpy as np
+from binarytree import BinaryTree
+from hierarchicalclustering import HierarchicalClustering
+from nummatrix import NumMatrix
+
+class NeighborJoining:
+
+    def __init__(self, matdists):
+        ## same inputs as HierarchicalClustering (NumMatrix, square or condensed distances)
+        self.matdists = matdists
+
+    def execute_clustering(self):
+        ## neighbor joining, the tree is rooted at the last join. Internal nodes keep the
+        ## branch lengths to their children in left_len / right_len.
+        ## The pair minimizing Q(i,j) = (r-2) D(i,j) - R(i) - R(j) is searched like RapidNJ:
+        ## every row keeps its distances sorted, rows are scanned in growing blocks and a row
+        ## stops as soon as (r-2) D(i,j) - R(i) - max(R) exceeds the best Q found so far.
+        D = HierarchicalClustering(self.matdists).dist_array()
+        n = D.shape[0]
+        if n < 2: return None
+        trees = [BinaryTree(i) for i in range(n)]
+        ## clusters have ids 0..2n-2 (id 2n-1 pads the sorted rows and is never alive)
+        alive = np.zeros(2*n, dtype=bool); alive[:n] = True
+        slot_of = np.zeros(2*n, dtype=np.int64); slot_of[:n] = np.arange(n)
+        cid = np.arange(n)
+        active = np.ones(n, dtype=bool)
+        R = D.sum(axis=1)
+        sd, sc = self.sorted_rows(D, active, cid, n)
+        built = n
+        next_cid = n
+        for r in range(n, 2, -1):
+            if 2 * r < built:
+                sd, sc = self.sorted_rows(D, active, cid, n)
+                built = r
+            i, j = self.find_pair(D, R, sd, sc, active, alive, slot_of, cid, r)
+            dij = D[i, j]
+            li = 0.5 * dij + 0.5 * (R[i] - R[j]) / (r - 2)
+            lj = dij - li
+            node = BinaryTree(-1, dij/2.0, trees[i], trees[j], li, lj)
+            du = 0.5 * (D[i] + D[j] - dij)
+            active[j] = False
+            du[~active] = 0; du[i] = 0
+            R += du - D[:, i] - D[:, j]
+            D[i] = du; D[:, i] = du
+            R[i] = du.sum()
+            alive[cid[i]] = False; alive[cid[j]] = False
+            cid[i] = next_cid; alive[next_cid] = True; slot_of[next_cid] = i
+            next_cid += 1
+            trees[i] = node; trees[j] = None
+            ## the new cluster only gets its own sorted row; its pairs are found from it
+            others = np.flatnonzero(active); others = others[others != i]
+            order = np.argsort(du[others], kind="stable")
+            sd[i] = np.inf; sc[i] = 2*n - 1
+            sd[i, :len(others)] = du[others][order]
+            sc[i, :len(others)] = cid[others][order]
+        a, b = np.flatnonzero(active)
+        return BinaryTree(-1, D[a, b]/2.0, trees[a], trees[b], D[a, b]/2.0, D[a, b]/2.0)
+
+    def sorted_rows(self, D, active, cid, n):
+        ## per slot: distances to the other active clusters in increasing order, and their ids
+        slots = np.flatnonzero(active)
+        sd = np.full((n, len(slots)), np.inf)
+        sc = np.full((n, len(slots)), 2*n - 1, dtype=np.int64)
+        sub = D[np.ix_(slots, slots)].copy()
+        np.fill_diagonal(sub, np.inf)
+        order = np.argsort(sub, axis=1, kind="stable")[:, :-1]
+        sd[slots, :len(slots)-1] = np.take_along_axis(sub, order, axis=1)
+        sc[slots, :len(slots)-1] = cid[slots][order]
+        return sd, sc
+
+    def find_pair(self, D, R, sd, sc, active, alive, slot_of, cid, r):
+        ## smallest Q, ties broken by the smallest (id, id) pair
+        rows = np.flatnonzero(active)
+        rmax = R[rows].max()
+        best = (np.inf, 0, 0)
+        lo = 0; width = 8
+        while len(rows) and lo < sd.shape[1]:
+            hi = min(sd.shape[1], lo + width)
+            d = sd[rows, lo:hi]
+            c = sc[rows, lo:hi]
+            ok = alive[c]
+            cols = np.where(ok, slot_of[c], 0)
+            q = np.where(ok, (r-2) * d - R[rows][:, None] - R[cols], np.inf)
+            qmin = q.min()
+            if qmin <= best[0]:
+                ri, ci = np.nonzero(q == qmin)
+                a = cid[rows[ri]]; b = c[ri, ci]
+                lo_id = np.minimum(a, b); hi_id = np.maximum(a, b)
+                k = np.lexsort((hi_id, lo_id))[0]
+                cand = (qmin, int(lo_id[k]), int(hi_id[k]))
+                if cand < best: best = cand
+            ## rows continue while an unseen entry could still reach the best Q
+            bound = (r-2) * sd[rows, hi-1] - R[rows] - rmax
+            rows = rows[bound <= best[0]]
+            lo = hi; width *= 2
+        return slot_of[best[1]], slot_of[best[2]]
+
+
+def test():
+    m = NumMatrix(5,5)
+    m.set_value(0, 1, 5)
+    m.set_value(0, 2, 9)
+    m.set_value(0, 3, 9)
+    m.set_value(0, 4, 8)
+    m.set_value(1, 2, 10)
+    m.set_value(1, 3, 10)
+    m.set_value(1, 4, 9)
+    m.set_value(2, 3, 8)
+    m.set_value(2, 4, 7)
+    m.set_value(3, 4, 3)
+    nj = NeighborJoining(m)
+    arv = nj.execute_clustering()
+    arv.print_tree()
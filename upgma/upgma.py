@@ -1,39 +1,71 @@
 
 # version with PWA as dist
 
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from nummatrix import NumMatrix
 from hierarchicalclustering import HierarchicalClustering
+from neighborjoining import NeighborJoining
 from myseq import MySeq
 from pairwisealignment import PairwiseAlignment
 from substmatrix import SubstMatrix
 from myalign import MyAlign
 from multiplealign import MultipleAlignment
 
+## pairwise aligner of each worker process, set once by init_worker
+worker_alseq = None
+
+def init_worker(alseq):
+    global worker_alseq
+    worker_alseq = alseq
+
+def distance_chunk(task):
+    ## number of differing alignment columns for a chunk of (i, j) pairs
+    seqs, chunk = task
+    counted = worker_alseq.align_many([(seqs[i], seqs[j]) for i, j in chunk], differences = True)
+    return [(i, j, ncd) for (i, j), (_, ncd) in zip(chunk, counted)]
+
 class UPGMA:
     
-    def __init__(self, seqs, alseq):
+    def __init__(self, seqs, alseq, workers = 1, progress = False):
         self.seqs = seqs
         self.alseq = alseq
+        self.workers = workers
+        self.progress = progress
         self.create_mat_dist()
         
     def create_mat_dist(self):
-        self.matdist = NumMatrix(len(self.seqs), len(self.seqs))
-        for i in range(len(self.seqs)):
-            for j in range(i, len(self.seqs)):
-                s1 = self.seqs[i]
-                s2 = self.seqs[j]
-                self.alseq.needleman_Wunsch(s1, s2)
-                alin = self.alseq.recover_align()
-                ncd = 0
-                for k in range(len(alin)):
-                    col = alin.column(k)
-                    if (col[0] != col[1]): ncd += 1
+        ## upper triangle only (the diagonal stays 0), split into chunks over a process pool
+        n = len(self.seqs)
+        self.matdist = NumMatrix(n, n)
+        pairs = [(i, j) for i in range(n) for j in range(i+1, n)]
+        if not pairs: return
+        nchunks = 4 * self.workers if self.workers > 1 else 1
+        size = -(-len(pairs) // nchunks)
+        tasks = [(self.seqs, pairs[k:k+size]) for k in range(0, len(pairs), size)]
+        if self.workers > 1:
+            executor = ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker, initargs=(self.alseq,))
+            results = as_completed([executor.submit(distance_chunk, t) for t in tasks])
+            results = (f.result() for f in results)
+        else:
+            init_worker(self.alseq)
+            executor = None
+            results = map(distance_chunk, tasks)
+        done = 0
+        for chunk in results:
+            for i, j, ncd in chunk:
                 self.matdist.set_value(i, j, ncd)
+            done += len(chunk)
+            if self.progress: print(f"Distance matrix: {done}/{len(pairs)} pairs")
+        if executor is not None: executor.shutdown()
 
     def run(self):
         ch = HierarchicalClustering(self.matdist)
         t = ch.execute_clustering()
         return t
+
+    def run_nj(self):
+        nj = NeighborJoining(self.matdist)
+        return nj.execute_clustering()
     
     def create_mat_dist_align(self, align):
         self.matdist = NumMatrix(len(align.listseqs), len(align.listseqs))